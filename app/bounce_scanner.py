@@ -2,22 +2,53 @@
 
 from __future__ import annotations
 
+import base64
+import binascii
 import imaplib
+import quopri
 import re
 from dataclasses import dataclass
-from email import message_from_bytes
-from email.message import Message
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy.engine import Connection
 
 from .config import Settings
 from .mail_db.operations import (
-    ParticipantNotFoundError,
-    find_participant_by_email,
-    mark_send_attempt_bounced,
+    find_participants_by_emails,
+    mail_db_connection,
+    mark_send_attempts_bounced,
+)
+
+EMAIL_RE = re.compile(rb"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+
+# Let the server discard ordinary unread mail: DSNs come from the mailer daemon
+# or carry a multipart/report body (RFC 3464).
+BOUNCE_SEARCH_CRITERIA = (
+    "UNSEEN",
+    "OR",
+    "FROM",
+    '"MAILER-DAEMON"',
+    "HEADER",
+    "Content-Type",
+    '"multipart/report"',
 )
 
-FINAL_RECIPIENT_RE = re.compile(r"Final-Recipient:\s*rfc822;\s*([^\s]+)", re.IGNORECASE)
-EMAIL_RE = re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", re.IGNORECASE)
+_ASCII_LOWER = bytes.maketrans(bytes(range(0x41, 0x5B)), bytes(range(0x61, 0x7B)))
+_RETURNED_ORIGINAL_TYPES = {"message/rfc822", "text/rfc822-headers"}
+# Only these headers feed the non-DSN fallback scan, and a part's recipient
+# lines sit at its start, so neither needs the full content.
+_HEADER_SECTION = "BODY.PEEK[HEADER.FIELDS (From Content-Type)]"
+_PART_FETCH_LIMIT = 8192
+_FINAL_RECIPIENT = b"final-recipient:"
+_RFC822_TYPE = b"rfc822;"
+_BLANKS = b" \t"
+_WHITESPACE = b" \t\r\n\x0b\x0c"
+
+_FETCH_ID_RE = re.compile(rb"^\s*(\d+)\s+\(")
+_FETCH_UID_RE = re.compile(rb"\bUID\s+(\d+)", re.IGNORECASE)
+_FETCH_SECTION_RE = re.compile(rb"BODY\[([^\]]*)\]")
+_LITERAL_MARKER_RE = re.compile(rb"\{\d+\}$")
+_SEXP_TOKEN_RE = re.compile(rb'\(|\)|"(?:[^"\\]|\\.)*"|[^\s()"]+')
 
 
 @dataclass
@@ -25,34 +56,310 @@ class BounceOutcome:
     """Summary of a bounce scanning run."""
 
     messages_seen: int
-    participants_updated: List[str]
-    unmatched_recipients: List[str]
+    participants_updated: Sequence[str]
+    unmatched_recipients: Sequence[str]
 
 
 class BounceScannerError(RuntimeError):
     """Raised when bounce scanning cannot proceed."""
 
 
-def _extract_recipients(message: Message) -> List[str]:
-    recipients: List[str] = []
+def _skip(buffer: bytes, index: int, chars: bytes) -> int:
+    while index < len(buffer) and buffer[index] in chars:
+        index += 1
+    return index
+
+
+def _find_final_recipients(body: bytes) -> List[bytes]:
+    """Return ``Final-Recipient: rfc822;`` addresses, lowercased.
 
-    for part in message.walk():
-        payload = part.get_payload(decode=True)
-        text = None
-        if isinstance(payload, bytes):
-            text = payload.decode(errors="ignore")
-        elif isinstance(payload, str):
-            text = payload
-        if text:
-            recipients.extend(FINAL_RECIPIENT_RE.findall(text))
+    Matches the field only at the start of a line, case-insensitively. The
+    scan is driven by ``bytes.find`` over a lowercased copy, which skips the
+    non-matching bulk of the body in C instead of stepping a regex through it.
+    """
+    lowered = body.translate(_ASCII_LOWER)
+    found: List[bytes] = []
+    pos = lowered.find(_FINAL_RECIPIENT)
+    while pos != -1:
+        if pos == 0 or lowered[pos - 1] == 0x0A:
+            start = _skip(lowered, pos + len(_FINAL_RECIPIENT), _BLANKS)
+            if lowered.startswith(_RFC822_TYPE, start):
+                start = _skip(lowered, start + len(_RFC822_TYPE), _BLANKS)
+                end = start
+                while end < len(lowered) and lowered[end] not in _WHITESPACE:
+                    end += 1
+                if end > start:
+                    found.append(lowered[start:end])
+        pos = lowered.find(_FINAL_RECIPIENT, pos + 1)
+    return found
+
+
+def _extract_recipients(header: bytes, body: bytes) -> Set[str]:
+    """Return normalised recipient addresses found in the raw DSN bytes."""
+    recipients: List[bytes] = _find_final_recipients(body)
     if not recipients:
-        body = message.as_string()
-        recipients.extend(FINAL_RECIPIENT_RE.findall(body))
-        if not recipients:
-            recipients.extend(EMAIL_RE.findall(body))
+        # Not a standard DSN; fall back to any address in the fetched bytes.
+        # Each buffer is scanned in place rather than joined into one copy.
+        recipients = [
+            addr
+            for raw in (header, body)
+            if b"@" in raw
+            for addr in EMAIL_RE.findall(raw)
+        ]
+
+    # Both patterns match whitespace-free runs, so lowercasing the bytes and
+    # decoding each unique address once is all the normalisation needed.
+    unique = {addr.translate(_ASCII_LOWER) for addr in recipients if b"@" in addr}
+    return {addr.decode("ascii", errors="ignore") for addr in unique}
+
+
+def _response_lines(data: List[Any]) -> Iterator[bytes]:
+    """Reassemble FETCH response lines, inlining literals as quoted strings."""
+    buffer = b""
+    for item in data:
+        if isinstance(item, tuple):
+            head, literal = item[0], item[1] or b""
+            escaped = literal.replace(b"\\", b"\\\\").replace(b'"', b'\\"')
+            buffer += _LITERAL_MARKER_RE.sub(b"", head) + b'"' + escaped + b'"'
+        elif isinstance(item, bytes):
+            yield buffer + item
+            buffer = b""
+    if buffer:
+        yield buffer
+
+
+def _parse_sexp(line: bytes) -> List[Any]:
+    """Parse an IMAP parenthesised list into nested Python lists."""
+    stack: List[List[Any]] = [[]]
+    for token in _SEXP_TOKEN_RE.findall(line):
+        if token == b"(":
+            stack.append([])
+        elif token == b")":
+            if len(stack) > 1:
+                closed = stack.pop()
+                stack[-1].append(closed)
+        elif token.startswith(b'"'):
+            stack[-1].append(token[1:-1].replace(b'\\"', b'"').replace(b"\\\\", b"\\"))
+        elif token.upper() == b"NIL":
+            stack[-1].append(None)
+        else:
+            stack[-1].append(token)
+    return stack[0]
+
+
+def _atom(value: Any) -> str:
+    if isinstance(value, bytes):
+        return value.decode(errors="ignore").lower()
+    return ""
+
+
+def _content_type(structure: List[Any]) -> str:
+    if structure and isinstance(structure[0], list):
+        return "multipart"
+    if len(structure) < 2:
+        return ""
+    return f"{_atom(structure[0])}/{_atom(structure[1])}"
+
+
+def _select_parts(structure: List[Any], section: str = "") -> List[Tuple[str, str]]:
+    """Return ``(section, encoding)`` for text and delivery-status parts."""
+    if structure and isinstance(structure[0], list):
+        selected: List[Tuple[str, str]] = []
+        children = []
+        for child in structure:
+            if not isinstance(child, list):
+                break
+            children.append(child)
+        # In a real DSN the returned original (message/rfc822 or
+        # text/rfc822-headers) sits next to the delivery-status part and can be
+        # far larger than the report itself, so it is not fetched. Without a
+        # delivery-status sibling, e.g. a forwarded DSN, nested messages are
+        # still searched.
+        is_report = any(
+            _content_type(child) == "message/delivery-status" for child in children
+        )
+        for index, child in enumerate(children, start=1):
+            if is_report and _content_type(child) in _RETURNED_ORIGINAL_TYPES:
+                continue
+            child_section = f"{section}.{index}" if section else str(index)
+            selected.extend(_select_parts(child, child_section))
+        return selected
+
+    if len(structure) < 6:
+        return []
+    content_type = _content_type(structure)
+    section = section or "1"
+    if content_type == "message/rfc822" and len(structure) > 8:
+        nested = structure[8]
+        if not isinstance(nested, list) or not nested:
+            return []
+        if isinstance(nested[0], list):
+            return _select_parts(nested, section)
+        return _select_parts(nested, f"{section}.1")
+    if content_type.startswith("text/") or content_type == "message/delivery-status":
+        return [(section, _atom(structure[5]) or "7bit")]
+    return []
+
+
+def _decode_part(payload: bytes, encoding: str) -> bytes:
+    if encoding == "base64":
+        try:
+            return base64.b64decode(payload)
+        except binascii.Error:
+            return payload
+    if encoding == "quoted-printable":
+        return quopri.decodestring(payload)
+    return payload
 
-    # normalise lowercase unique
-    return list({addr.strip().lower() for addr in recipients if "@" in addr})
+
+def _fetch_bodystructures(
+    connection: Any, uid_set: bytes
+) -> Dict[bytes, List[Tuple[str, str]]]:
+    status, data = connection.uid("FETCH", uid_set, "(UID BODYSTRUCTURE)")
+    if status != "OK":
+        raise BounceScannerError("IMAP fetch failed")
+
+    structures: Dict[bytes, List[Tuple[str, str]]] = {}
+    for line in _response_lines(data or []):
+        parsed = _parse_sexp(line)
+        if len(parsed) < 2 or not isinstance(parsed[1], list):
+            continue
+        attributes = parsed[1]
+        values = {
+            _atom(attributes[index]): attributes[index + 1]
+            for index in range(0, len(attributes) - 1, 2)
+        }
+        uid, structure = values.get("uid"), values.get("bodystructure")
+        if isinstance(uid, bytes) and isinstance(structure, list):
+            structures[uid] = _select_parts(structure)
+    return structures
+
+
+def _iter_fetched_sections(data: List[Any]) -> Iterator[Tuple[bytes, Dict[str, bytes]]]:
+    """Yield ``(uid, {section: bytes})`` from a multi-message UID FETCH response.
+
+    Servers may report the UID before or after the literals, so it is picked up
+    from any fragment belonging to the current message.
+    """
+    current: Optional[bytes] = None
+    uid: Optional[bytes] = None
+    sections: Dict[str, bytes] = {}
+    for item in data:
+        if isinstance(item, tuple):
+            head = item[0]
+            id_match = _FETCH_ID_RE.match(head)
+            if id_match:
+                if current is not None and uid is not None:
+                    yield uid, sections
+                current, uid, sections = id_match.group(1), None, {}
+            section_match = _FETCH_SECTION_RE.search(head)
+            if section_match and current is not None:
+                section = section_match.group(1).decode().upper()
+                if section.startswith("HEADER"):
+                    section = "HEADER"
+                sections[section] = item[1] or b""
+        elif isinstance(item, bytes):
+            head = item
+        else:
+            continue
+        uid_match = _FETCH_UID_RE.search(head)
+        if uid_match and current is not None:
+            uid = uid_match.group(1)
+    if current is not None and uid is not None:
+        yield uid, sections
+
+
+def _whole_lines(payload: bytes) -> bytes:
+    """Drop the line cut short by a partial fetch so it decodes cleanly."""
+    if len(payload) < _PART_FETCH_LIMIT:
+        return payload
+    end = payload.rfind(b"\n")
+    return payload[: end + 1] if end != -1 else payload
+
+
+def _fetch_bounce_payloads(
+    connection: Any, uids: List[bytes]
+) -> Iterator[Tuple[bytes, bytes, bytes]]:
+    """Yield ``(uid, header, body)`` fetching only the parts a DSN needs.
+
+    The BODYSTRUCTURE pass locates text and ``message/delivery-status`` parts
+    so attachments are never downloaded, and each part is capped with a partial
+    fetch. Messages sharing the same layout are fetched together, which keeps
+    typical scans at two round trips.
+    """
+    structures = _fetch_bodystructures(connection, b",".join(uids))
+    groups: Dict[Tuple[Tuple[str, str], ...], List[bytes]] = {}
+    for uid, parts in structures.items():
+        groups.setdefault(tuple(parts), []).append(uid)
+
+    for layout, group_uids in groups.items():
+        spec = "(" + _HEADER_SECTION
+        spec += "".join(
+            f" BODY.PEEK[{section}]<0.{_PART_FETCH_LIMIT}>" for section, _ in layout
+        )
+        spec += ")"
+        status, data = connection.uid("FETCH", b",".join(group_uids), spec)
+        if status != "OK":
+            raise BounceScannerError("IMAP fetch failed")
+        for uid, sections in _iter_fetched_sections(data or []):
+            body = b"\n".join(
+                _decode_part(_whole_lines(sections.get(section, b"")), encoding)
+                for section, encoding in layout
+            )
+            yield uid, sections.get("HEADER", b""), body
+
+
+def _process_bounce_chunk(
+    connection: Any,
+    db: Connection,
+    settings: Settings,
+    uids: List[bytes],
+    *,
+    mark_seen: bool,
+    participants_updated: Set[str],
+    unmatched: Set[str],
+) -> int:
+    """Fetch, resolve and flag one chunk of bounce UIDs; return messages seen."""
+
+    seen_uids: List[bytes] = []
+    recipients: Set[str] = set()
+    for uid, header, body in _fetch_bounce_payloads(connection, uids):
+        seen_uids.append(uid)
+        recipients.update(_extract_recipients(header, body))
+    # The same address often bounces in several DSN copies; resolve it once.
+    recipients -= unmatched
+
+    # One lookup and one transaction per chunk instead of a round trip per
+    # recipient.
+    matches = find_participants_by_emails(settings.mail_db_path, recipients, conn=db)
+    matched: List[Tuple[str, str]] = []
+    for recipient in recipients:
+        mapping = matches.get(recipient)
+        if not mapping:
+            unmatched.add(recipient)
+            continue
+        matched.append((recipient, mapping[1]))
+    updated = set(
+        mark_send_attempts_bounced(
+            settings.mail_db_path,
+            [(did, f"bounced for {recipient}") for recipient, did in matched],
+            changed_by="bounce-scanner",
+            conn=db,
+        )
+    )
+    # Commit before flagging so a message is never marked seen without its
+    # bounce being recorded.
+    db.commit()
+    for recipient, user_did in matched:
+        if user_did in updated:
+            participants_updated.add(user_did)
+        else:
+            unmatched.add(recipient)
+
+    if mark_seen and seen_uids:
+        # .SILENT stops the server echoing an untagged FETCH per message.
+        connection.uid("STORE", b",".join(seen_uids), "+FLAGS.SILENT", "(\\Seen)")
+    return len(seen_uids)
 
 
 def scan_bounces(
@@ -76,8 +383,8 @@ def scan_bounces(
     if factory is None:
         factory = imaplib.IMAP4_SSL if settings.imap_use_ssl else imaplib.IMAP4
 
-    participants_updated: List[str] = []
-    unmatched: List[str] = []
+    participants_updated: Set[str] = set()
+    unmatched: Set[str] = set()
     messages_seen = 0
 
     connection = factory(settings.imap_host, settings.imap_port)
@@ -89,42 +396,28 @@ def scan_bounces(
                 f"Unable to select mailbox {settings.imap_mailbox!r}"
             )
 
-        status, data = connection.search(None, "UNSEEN")
+        # UIDs stay valid across sessions, unlike sequence numbers.
+        status, data = connection.uid("SEARCH", None, *BOUNCE_SEARCH_CRITERIA)
         if status != "OK":
             raise BounceScannerError("IMAP search failed")
 
-        ids = data[0].split()
-        for msg_id in ids:
-            fetch_status, payload = connection.fetch(msg_id, "(RFC822)")
-            if fetch_status != "OK" or not payload:
-                continue
-            raw_message = payload[0][1]
-            if not raw_message:
-                continue
-            messages_seen += 1
-            message = message_from_bytes(raw_message)
-            recipients = _extract_recipients(message)
-            if not recipients:
-                continue
-            for recipient in recipients:
-                mapping = find_participant_by_email(settings.mail_db_path, recipient)
-                if not mapping:
-                    unmatched.append(recipient)
-                    continue
-                participant_id, user_did = mapping
-                try:
-                    mark_send_attempt_bounced(
-                        settings.mail_db_path,
-                        user_did=user_did,
-                        reason=f"bounced for {recipient}",
-                        changed_by="bounce-scanner",
-                    )
-                    participants_updated.append(user_did)
-                except ParticipantNotFoundError:
-                    unmatched.append(recipient)
-
-            if mark_seen:
-                connection.store(msg_id, "+FLAGS", "(\\Seen)")
+        uids = data[0].split()
+        # Work through the mailbox in fixed-size chunks so each chunk's DB
+        # updates and \Seen flags land before the next one is fetched; an
+        # interrupted scan then resumes from the remaining unseen messages.
+        batch_size = max(1, settings.imap_batch_size)
+        with mail_db_connection(settings.mail_db_path) as db:
+            for start in range(0, len(uids), batch_size):
+                chunk = uids[start : start + batch_size]
+                messages_seen += _process_bounce_chunk(
+                    connection,
+                    db,
+                    settings,
+                    chunk,
+                    mark_seen=mark_seen,
+                    participants_updated=participants_updated,
+                    unmatched=unmatched,
+                )
     finally:
         try:
             connection.close()
@@ -134,6 +427,6 @@ def scan_bounces(
 
     return BounceOutcome(
         messages_seen=messages_seen,
-        participants_updated=participants_updated,
-        unmatched_recipients=unmatched,
+        participants_updated=sorted(participants_updated),
+        unmatched_recipients=sorted(unmatched),
     )
@@ -2,48 +2,36 @@
 
 from __future__ import annotations
 
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timezone
 from pathlib import Path
-from typing import Any, List, Optional
+from typing import TYPE_CHECKING, Any, Iterator, List, Optional
 import csv
+import functools
+import itertools
 
 import click
-from sqlalchemy import text
-from dateutil import parser as date_parser
 
 from .config import Settings
-from .compliance_snapshot import (
-    WindowSummary,
-    compute_window_summary,
-    get_daily_engagement_breakdown,
-)
-from .db import get_engine
-from .email_renderer import render_daily_progress
-from .bounce_scanner import BounceScannerError, scan_bounces
-from .mail_db import apply_migrations
-from .mail_db.operations import (
-    ALLOWED_STATUSES,
-    DEFAULT_STATUS,
-    DEFAULT_TYPE,
-    InvalidStatusError,
-    ParticipantNotFoundError,
-    export_participants_to_csv,
-    fetch_recent_send_attempts,
-    find_participant_by_email,
-    seed_survey_completion,
-    list_participants,
-    set_participant_status,
-    upsert_compliance_monitoring_rows,
-    upsert_participants,
-)
-from .mailer import MailSender
-from .participants import Participant, filter_active, load_participants
-from .qualtrics_sync import QualtricsSyncError, sync_participants_from_qualtrics
+from .mail_db.constants import ALLOWED_STATUSES, DEFAULT_STATUS, DEFAULT_TYPE
+from .participants import Participant, load_active_participants, load_participants
+
+if TYPE_CHECKING:
+    from .compliance_snapshot import WindowSummary
+
+# Feature modules (mail.db operations, compliance queries, rendering,
+# SMTP/IMAP, Qualtrics) are imported inside the commands that use them so
+# ``--help`` and cron-driven invocations skip sqlalchemy, requests and
+# friends until a command actually needs them.
 
 DEFAULT_STATUS_CHANGED_BY = "mail-updater-cli"
 
 
+@functools.cache
 def _load_settings() -> Settings:
+    # Shared across commands in one process; derive variants with
+    # ``with_overrides`` rather than mutating the returned instance.
     return Settings()
 
 
@@ -94,29 +82,26 @@ def _load_participant_map(csv_path: Path, mail_db_path: Path) -> dict[str, Parti
     return {p.user_did: p for p in participants}
 
 
-def _participant_has_activity(engine, user_did: str) -> bool:
-    """Return True when the participant appears in feed_requests or engagements."""
-    queries = (
-        text("SELECT 1 FROM feed_requests WHERE requester_did = :did LIMIT 1"),
-        text("SELECT 1 FROM engagements WHERE did_engagement = :did LIMIT 1"),
-    )
-    with engine.connect() as conn:
-        for query in queries:
-            if conn.execute(query, {"did": user_did}).first():
-                return True
-    return False
+def _load_active_participants(csv_path: Path, mail_db_path: Path) -> list[Participant]:
+    try:
+        return load_active_participants(csv_path, mail_db_path=mail_db_path)
+    except FileNotFoundError as exc:
+        raise click.ClickException(str(exc)) from exc
 
 
 def _summaries_for_participants(
-    settings: Settings, participants: list[Participant]
+    settings: Settings, participants: list[Participant], *, detail: bool = True
 ) -> dict[str, WindowSummary]:
-    engine = get_engine(settings.compliance_db_path)
-    summaries: dict[str, WindowSummary] = {}
-    for participant in participants:
-        summary = compute_window_summary(engine, participant.user_did, settings)
-        if summary:
-            summaries[participant.user_did] = summary
-    return summaries
+    from .compliance_snapshot import compute_window_summaries_bulk
+    from .db import get_engine
+
+    engine = get_engine(settings.compliance_db_path, read_only=True)
+    return compute_window_summaries_bulk(
+        engine,
+        [participant.user_did for participant in participants],
+        settings,
+        detail=detail,
+    )
 
 
 @click.group()
@@ -128,26 +113,29 @@ def cli() -> None:
 def aggregate_command() -> None:
     """Compute window summaries for all participants and print a quick overview."""
     settings = _load_settings()
-    participant_map = _load_participant_map(
+    active_participants = _load_active_participants(
         settings.participants_csv_path, settings.mail_db_path
     )
-    active_participants = filter_active(participant_map.values())
-    summaries = _summaries_for_participants(settings, active_participants)
+    # Only the window tally is printed, so skip building per-day snapshots.
+    summaries = _summaries_for_participants(
+        settings, active_participants, detail=False
+    )
 
     if not summaries:
         click.echo("No participant summaries computed. Check data availability.")
         return
 
-    click.echo("Participant progress snapshot:")
+    lines = ["Participant progress snapshot:"]
     for participant in active_participants:
         summary = summaries.get(participant.user_did)
         if not summary:
-            click.echo(f"- {participant.user_did}: no activity recorded in the window")
+            lines.append(f"- {participant.user_did}: no activity recorded in the window")
             continue
         status = "on-track" if summary.on_track else "off-track"
-        click.echo(
+        lines.append(
             f"- {participant.user_did}: {summary.active_days}/{summary.required_active_days} active days ({status})"
         )
+    click.echo("\n".join(lines))
 
 
 @cli.command("preview")
@@ -156,6 +144,10 @@ def aggregate_command() -> None:
 )
 def preview_command(user_did: str) -> None:
     """Render a single participant's email to stdout."""
+    from .compliance_snapshot import compute_window_summary
+    from .db import get_engine
+    from .email_renderer import render_daily_progress
+
     settings = _load_settings()
     participant_map = _load_participant_map(
         settings.participants_csv_path, settings.mail_db_path
@@ -166,7 +158,7 @@ def preview_command(user_did: str) -> None:
             f"No participant with DID {user_did} found in roster (CSV/mail.db)."
         )
 
-    engine = get_engine(settings.compliance_db_path)
+    engine = get_engine(settings.compliance_db_path, read_only=True)
     summary = compute_window_summary(engine, participant.user_did, settings)
     if not summary:
         raise click.ClickException("No compliance data available for that participant.")
@@ -185,30 +177,33 @@ def preview_command(user_did: str) -> None:
 )
 def send_daily_command(dry_run: Optional[bool]) -> None:
     """Send (or dry-run) daily emails for all include-in-emails participants."""
+    from .email_renderer import render_daily_progress
+    from .mail_db.operations import find_participant_ids
+    from .mailer import MailSender
+
     settings = _load_settings()
     if dry_run is not None:
-        settings.smtp_dry_run = dry_run
+        settings = settings.with_overrides(smtp_dry_run=dry_run)
 
     sender = MailSender(settings)
-    participant_map = _load_participant_map(
+    active_participants = _load_active_participants(
         settings.participants_csv_path, settings.mail_db_path
     )
-    active_participants = filter_active(participant_map.values())
 
     summaries = _summaries_for_participants(settings, active_participants)
     if not summaries:
         click.echo("No participant summaries computed. Nothing to send.")
         return
 
-    total = 0
-    sent = 0
-    for participant in active_participants:
-        total += 1
+    mode = "dry-run" if settings.smtp_dry_run else "sent"
+    participant_ids = find_participant_ids(
+        settings.mail_db_path, (p.user_did for p in active_participants)
+    )
+
+    def deliver(participant: Participant) -> tuple[bool, str]:
         summary = summaries.get(participant.user_did)
         if not summary:
-            click.echo(f"[skip] {participant.user_did}: no data in window.")
-            continue
-
+            return False, f"[skip] {participant.user_did}: no data in window."
         rendered = render_daily_progress(
             summary, participant, subject=settings.mail_subject
         )
@@ -218,10 +213,24 @@ def send_daily_command(dry_run: Optional[bool]) -> None:
             user_did=participant.user_did,
             message_type="daily_update",
             template_version="daily_progress_v1",
+            participant_id=participant_ids.get(participant.user_did),
         )
-        sent += 1
-        mode = "dry-run" if settings.smtp_dry_run else "sent"
-        click.echo(f"[{mode}] {participant.user_did} -> {participant.email}")
+        return True, f"[{mode}] {participant.user_did} -> {participant.email}"
+
+    total = 0
+    sent = 0
+    # SMTP round-trips dominate a live run, so up to SMTP_CONCURRENCY sends are
+    # in flight at once, each worker reusing its own SMTP session. Results are
+    # echoed in roster order; a failure cancels the sends not yet started.
+    pool = ThreadPoolExecutor(max_workers=max(1, settings.smtp_concurrency))
+    with sender:
+        try:
+            for delivered, line in pool.map(deliver, active_participants):
+                total += 1
+                sent += delivered
+                click.echo(line)
+        finally:
+            pool.shutdown(cancel_futures=True)
 
     click.echo(
         f"Completed send loop. Participants processed: {total}; messages prepared: {sent}."
@@ -244,6 +253,8 @@ def sync_participants_command(
     survey_ids: tuple[str, ...], survey_filter: Optional[str]
 ) -> None:
     """Refresh the participant roster from Qualtrics via the REST API."""
+    from .qualtrics_sync import QualtricsSyncError, sync_participants_from_qualtrics
+
     settings = _load_settings()
     survey_ids_list = [sid for sid in survey_ids if sid]
     if survey_ids_list and survey_filter:
@@ -275,6 +286,9 @@ def sync_participants_command(
 @cli.command("validate-participants")
 def validate_participants_command() -> None:
     """Verify participant roster entries are unique and present in compliance data."""
+    from .compliance_snapshot import participants_with_activity
+    from .db import get_engine
+
     settings = _load_settings()
     participants = load_participants(
         settings.participants_csv_path, mail_db_path=settings.mail_db_path
@@ -283,33 +297,34 @@ def validate_participants_command() -> None:
         raise click.ClickException("No participants found in mail.db or CSV roster.")
 
     participant_map = {p.user_did: p for p in participants}
-    engine = get_engine(settings.compliance_db_path)
+    engine = get_engine(settings.compliance_db_path, read_only=True)
 
-    duplicates: list[str] = []
-    seen: set[str] = set()
+    counts = Counter(participant.user_did for participant in participants)
+    duplicates = [did for did, count in counts.items() if count > 1]
 
-    missing_activity: list[Participant] = []
-    for participant in participants:
-        if participant.user_did in seen:
-            duplicates.append(participant.user_did)
-            continue
-        seen.add(participant.user_did)
-        if not _participant_has_activity(engine, participant.user_did):
-            missing_activity.append(participant)
+    active_dids = participants_with_activity(engine, participant_map)
+    missing_activity = [
+        participant
+        for did, participant in participant_map.items()
+        if did not in active_dids
+    ]
 
     click.echo(f"Participants in roster: {len(participant_map)}")
     if duplicates:
         click.echo(f"Duplicate DIDs detected: {len(duplicates)}")
-        for did in duplicates:
-            click.echo(f"  - {did}")
+        click.echo("\n".join(f"  - {did}" for did in duplicates))
         raise click.ClickException("Duplicate participant DIDs detected in roster.")
     else:
         click.echo("No duplicate DIDs detected.")
 
     if missing_activity:
         click.echo(f"Participants without compliance activity: {len(missing_activity)}")
-        for participant in missing_activity:
-            click.echo(f"  - {participant.user_did} ({participant.email})")
+        click.echo(
+            "\n".join(
+                f"  - {participant.user_did} ({participant.email})"
+                for participant in missing_activity
+            )
+        )
         raise click.ClickException(
             "Participant roster contains entries without compliance activity."
         )
@@ -340,6 +355,13 @@ def cache_daily_snapshots_command(
     study_label: str, from_date: Optional[str], to_date: Optional[str]
 ) -> None:
     """Cache per-day compliance metrics into mail.db."""
+    from .compliance_snapshot import get_daily_engagement_breakdown_bulk
+    from .db import get_engine
+    from .mail_db.operations import (
+        ComplianceMonitoringRow,
+        list_participant_dids,
+        upsert_compliance_monitoring_rows,
+    )
 
     settings = _load_settings()
     requirements = _merge_study_requirements(settings, study_label)
@@ -361,27 +383,22 @@ def cache_daily_snapshots_command(
     if start_day and end_day and start_day > end_day:
         raise click.ClickException("from-date must be on or before to-date.")
 
-    roster = list_participants(study_settings.mail_db_path)
-    if not roster:
+    roster_dids = list_participant_dids(study_settings.mail_db_path)
+    if not roster_dids:
         raise click.ClickException("No participants found in mail.db; run sync-participants first.")
 
-    engagement_engine = get_engine(study_settings.compliance_db_path)
+    engagement_engine = get_engine(study_settings.compliance_db_path, read_only=True)
     computed_at = datetime.now(timezone.utc)
-    rows_to_insert: List[dict[str, Any]] = []
-
-    for participant in roster:
-        user_did = participant.get("did")
-        if not user_did:
-            continue
-
-        snapshots = get_daily_engagement_breakdown(
-            engagement_engine,
-            user_did,
-            study_settings,
-            start_day=start_day,
-            end_day=end_day,
-        )
+    breakdowns = get_daily_engagement_breakdown_bulk(
+        engagement_engine,
+        roster_dids,
+        study_settings,
+        start_day=start_day,
+        end_day=end_day,
+    )
 
+    rows_to_insert: List[ComplianceMonitoringRow] = []
+    for user_did, snapshots in breakdowns.items():
         cumulative_active = 0
         skip_streak = 0
         for snap in snapshots:
@@ -393,18 +410,18 @@ def cache_daily_snapshots_command(
                 skip_streak += 1
 
             rows_to_insert.append(
-                {
-                    "snapshot_date": snap.study_day,
-                    "user_did": user_did,
-                    "study_label": study_label,
-                    "retrievals": snap.retrievals,
-                    "engagements": snap.engagements,
-                    "engagement_breakdown": snap.engagement_breakdown,
-                    "active_day": 1 if is_active else 0,
-                    "cumulative_active": cumulative_active,
-                    "cumulative_skip": skip_streak,
-                    "computed_at": computed_at,
-                }
+                ComplianceMonitoringRow(
+                    snapshot_date=snap.study_day,
+                    user_did=user_did,
+                    study_label=study_label,
+                    retrievals=snap.retrievals,
+                    engagements=snap.engagements,
+                    engagement_breakdown=snap.engagement_breakdown,
+                    active_day=1 if is_active else 0,
+                    cumulative_active=cumulative_active,
+                    cumulative_skip=skip_streak,
+                    computed_at=computed_at,
+                )
             )
 
     inserted = upsert_compliance_monitoring_rows(
@@ -450,6 +467,13 @@ def participant_set_status_command(
     user_did: str, status: str, reason: Optional[str], changed_by: Optional[str]
 ) -> None:
     """Update a participant status and record the change in mail.db."""
+    from .mail_db.operations import (
+        InvalidStatusError,
+        ParticipantNotFoundError,
+        export_participants_to_csv,
+        set_participant_status,
+    )
+
     settings = _load_settings()
     settings.ensure_mail_db_parent()
     actor = changed_by or DEFAULT_STATUS_CHANGED_BY
@@ -486,43 +510,52 @@ def participant_set_status_command(
         )
 
 
+def _iter_import_rows(reader: csv.DictReader) -> Iterator[dict[str, str]]:
+    """Yield cleaned roster rows from the participants CSV, skipping blanks."""
+    for raw in reader:
+        email = (raw.get("email") or "").strip()
+        did = (raw.get("did") or raw.get("user_did") or "").strip()
+        if not email or not did:
+            continue
+        yield {
+            "email": email,
+            "did": did,
+            "status": (raw.get("status") or "active").strip(),
+            "type": (raw.get("type") or "pilot").strip(),
+            "language": (raw.get("language") or "en").strip() or "en",
+            "feed_url": (raw.get("feed_url") or "").strip(),
+            "survey_completed_at": (raw.get("survey_completed_at") or "").strip(),
+            "prolific_id": (raw.get("prolific_id") or "").strip(),
+            "study_type": (raw.get("study_type") or "").strip(),
+        }
+
+
 @participant_group.command("import-csv")
 def participant_import_csv_command() -> None:
     """Import rows from participants CSV into mail.db (upsert)."""
+    from .mail_db.operations import export_participants_to_csv, upsert_participants
+
     settings = _load_settings()
     if not settings.participants_csv_path.exists():
         raise click.ClickException(
             f"Participants CSV not found at {settings.participants_csv_path}"
         )
 
-    rows: list[dict[str, str]] = []
     with settings.participants_csv_path.open(encoding="utf-8", newline="") as handle:
         reader = csv.DictReader(handle)
         if reader.fieldnames is None:
             raise click.ClickException("Participants CSV has no header row.")
-        for raw in reader:
-            email = (raw.get("email") or "").strip()
-            did = (raw.get("did") or raw.get("user_did") or "").strip()
-            if not email or not did:
-                continue
-            rows.append(
-                {
-                    "email": email,
-                    "did": did,
-                    "status": (raw.get("status") or "active").strip(),
-                    "type": (raw.get("type") or "pilot").strip(),
-                    "language": (raw.get("language") or "en").strip() or "en",
-                    "feed_url": (raw.get("feed_url") or "").strip(),
-                    "survey_completed_at": (raw.get("survey_completed_at") or "").strip(),
-                    "prolific_id": (raw.get("prolific_id") or "").strip(),
-                    "study_type": (raw.get("study_type") or "").strip(),
-                }
+        rows = _iter_import_rows(reader)
+        first = next(rows, None)
+        if first is None:
+            raise click.ClickException(
+                "No valid rows found in participants CSV to import."
             )
+        # Stream the remaining rows so the file is never held in memory.
+        result = upsert_participants(
+            settings.mail_db_path, itertools.chain([first], rows)
+        )
 
-    if not rows:
-        raise click.ClickException("No valid rows found in participants CSV to import.")
-
-    result = upsert_participants(settings.mail_db_path, rows)
     export_participants_to_csv(settings.mail_db_path, settings.participants_csv_path)
     click.echo(
         "Participants imported into mail.db "
@@ -537,6 +570,7 @@ def participant_import_csv_command() -> None:
     "--status",
     default=DEFAULT_STATUS,
     show_default=True,
+    type=click.Choice(sorted(ALLOWED_STATUSES), case_sensitive=False),
     help="Initial participant status.",
 )
 @click.option(
@@ -572,6 +606,12 @@ def participant_add_command(
     survey_completed_at: Optional[str],
 ) -> None:
     """Insert a single participant row into mail.db for manual testing."""
+    from .mail_db.operations import (
+        export_participants_to_csv,
+        find_participant_by_email,
+        participant_exists,
+        upsert_participants,
+    )
 
     email = email.strip()
     did = did.strip()
@@ -580,13 +620,6 @@ def participant_add_command(
     if not did:
         raise click.ClickException("DID must not be empty.")
 
-    normalized_status = status.strip().lower() or DEFAULT_STATUS
-    if normalized_status not in ALLOWED_STATUSES:
-        allowed = ", ".join(sorted(ALLOWED_STATUSES))
-        raise click.ClickException(
-            f"Invalid status {status!r}. Allowed values: {allowed}."
-        )
-
     participant_type = participant_type.strip() or DEFAULT_TYPE
     language = language.strip() or "en"
     feed_url = (feed_url or "").strip() or None
@@ -595,8 +628,7 @@ def participant_add_command(
     completion_raw = (survey_completed_at or "").strip() or None
 
     settings = _load_settings()
-    existing = {row["did"]: row for row in list_participants(settings.mail_db_path)}
-    if did in existing:
+    if participant_exists(settings.mail_db_path, did):
         raise click.ClickException(
             f"Participant with DID {did!r} already exists in mail.db."
         )
@@ -614,7 +646,7 @@ def participant_add_command(
             {
                 "email": email,
                 "did": did,
-                "status": normalized_status,
+                "status": status,
                 "type": participant_type,
                 "language": language,
                 "feed_url": feed_url or "",
@@ -649,10 +681,12 @@ def participant_seed_completion_command(
     timestamp: str, participant_types: tuple[str, ...]
 ) -> None:
     """Seed survey_completed_at for admin/test accounts."""
+    from .mail_db.operations import seed_survey_completion
 
     try:
-        parsed = date_parser.parse(timestamp)
-    except (ValueError, TypeError) as exc:  # pragma: no cover - defensive
+        # Python 3.11's fromisoformat accepts the full ISO 8601 form, "Z" included.
+        parsed = datetime.fromisoformat(timestamp)
+    except ValueError as exc:
         raise click.ClickException(f"Invalid timestamp {timestamp!r}: {exc}") from exc
 
     if not parsed.tzinfo:
@@ -692,16 +726,18 @@ def status_command(
     limit: int, user_did: Optional[str], message_type: Optional[str]
 ) -> None:
     """Display recent send attempts captured in mail.db."""
+    from .mail_db.operations import SEND_ATTEMPT_FETCH_SIZE, iter_recent_send_attempts
 
     settings = _load_settings()
-    attempts = fetch_recent_send_attempts(
+    attempts = iter_recent_send_attempts(
         settings.mail_db_path,
         limit=limit,
         user_did=user_did,
         message_type=message_type,
     )
 
-    if not attempts:
+    first = next(attempts, None)
+    if first is None:
         click.echo("No send attempts recorded.")
         return
 
@@ -710,8 +746,6 @@ def status_command(
         header += f" — user {user_did}"
     if message_type:
         header += f" — type {message_type}"
-    click.echo(header)
-
     columns = [
         "created_at",
         "user_did",
@@ -720,17 +754,24 @@ def status_command(
         "status",
         "smtp_response",
     ]
-    click.echo(" | ".join(columns))
-    click.echo("-" * 80)
+    click.echo("\n".join([header, " | ".join(columns), "-" * 80]))
 
-    for attempt in attempts:
+    # Rows stream from mail.db; echo them a batch at a time so large --limit
+    # values neither sit in memory nor cost one write per line.
+    lines: list[str] = []
+    for attempt in itertools.chain([first], attempts):
         row = []
         for column in columns:
             value = attempt.get(column)
             if column == "created_at" and value is not None:
                 value = getattr(value, "isoformat", lambda: str(value))()
             row.append(str(value or ""))
-        click.echo(" | ".join(row))
+        lines.append(" | ".join(row))
+        if len(lines) >= SEND_ATTEMPT_FETCH_SIZE:
+            click.echo("\n".join(lines))
+            lines.clear()
+    if lines:
+        click.echo("\n".join(lines))
 
 
 @cli.command("bounces-scan")
@@ -742,6 +783,7 @@ def status_command(
 )
 def bounces_scan_command(keep_unseen: bool) -> None:
     """Poll the IMAP bounce mailbox and suppress participants with hard bounces."""
+    from .bounce_scanner import BounceScannerError, scan_bounces
 
     settings = _load_settings()
     try:
@@ -756,18 +798,20 @@ def bounces_scan_command(keep_unseen: bool) -> None:
     if outcome.participants_updated:
         click.echo(
             "Participants suppressed: "
-            + ", ".join(sorted(set(outcome.participants_updated)))
+            + ", ".join(outcome.participants_updated)
         )
     if outcome.unmatched_recipients:
         click.echo(
             "Unmatched recipients: "
-            + ", ".join(sorted(set(outcome.unmatched_recipients)))
+            + ", ".join(outcome.unmatched_recipients)
         )
 
 
 @cli.command("migrate-mail-db")
 def migrate_mail_db_command() -> None:
     """Apply mail.db migrations to ensure the schema is up to date."""
+    from .mail_db import apply_migrations
+
     settings = _load_settings()
     settings.ensure_mail_db_parent()
     version = apply_migrations(settings.mail_db_path)
@@ -2,20 +2,22 @@
 
 from __future__ import annotations
 
+from bisect import bisect_right
 from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import date, datetime, time, timedelta, timezone
-from typing import Dict, Iterable, List, Optional, Sequence
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from zoneinfo import ZoneInfo
 
-from dateutil import parser as date_parser
-import pytz
-from sqlalchemy import text
-from sqlalchemy.engine import Engine
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql.elements import TextClause
 
 from .config import Settings
 
 
-@dataclass
+@dataclass(slots=True)
 class DailySnapshot:
     study_day: date
     retrievals: int
@@ -26,7 +28,7 @@ class DailySnapshot:
     engagement_breakdown: Dict[str, int] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class WindowSummary:
     user_did: str
     snapshots: List[DailySnapshot]
@@ -37,209 +39,348 @@ class WindowSummary:
     computed_at: datetime
 
 
+# Keeps IN (...) lists under SQLite's default bound-parameter limit.
+DID_CHUNK_SIZE = 500
+# Rows buffered per fetch while streaming activity rows out of SQLite.
+ROW_FETCH_SIZE = 1000
+# SQLite strftime formats naming a timestamp's UTC hour / minute; strftime
+# applies any "+HH:MM" / "Z" suffix, so offset-bearing rows land in UTC buckets.
+HOUR_BUCKET = "%Y-%m-%dT%H"
+MINUTE_BUCKET = "%Y-%m-%dT%H:%M"
+
+_FIRST_REQUESTS_QUERY = text(
+    """
+    SELECT requester_did, MIN(timestamp) FROM feed_requests
+    WHERE requester_did IN :dids
+    GROUP BY requester_did
+    """
+).bindparams(bindparam("dids", expanding=True))
+# Activity is counted per UTC time bucket in SQLite; Python then only maps each
+# distinct bucket to a study day instead of parsing every row.
+_FEED_COUNTS_QUERY = text(
+    """
+    SELECT requester_did, strftime(:bucket, timestamp) AS bucket, NULL, COUNT(*)
+    FROM feed_requests
+    WHERE requester_did IN :dids AND timestamp >= :start AND timestamp < :end
+    GROUP BY requester_did, bucket
+    """
+).bindparams(bindparam("dids", expanding=True))
+_ENGAGEMENT_COUNTS_QUERY = text(
+    """
+    SELECT did_engagement, strftime(:bucket, timestamp) AS bucket,
+           engagement_type, COUNT(*)
+    FROM engagements
+    WHERE did_engagement IN :dids
+      AND timestamp >= :start AND timestamp < :end
+      AND engagement_type IS NOT NULL
+    GROUP BY did_engagement, bucket, engagement_type
+    """
+).bindparams(bindparam("dids", expanding=True))
+_ACTIVE_DIDS_QUERY = text(
+    """
+    SELECT requester_did FROM feed_requests WHERE requester_did IN :dids
+    UNION
+    SELECT did_engagement FROM engagements WHERE did_engagement IN :dids
+    """
+).bindparams(bindparam("dids", expanding=True))
+
+
+def participants_with_activity(engine: Engine, user_dids: Iterable[str]) -> Set[str]:
+    """Return the subset of ``user_dids`` found in feed_requests or engagements."""
+    active: Set[str] = set()
+    with engine.connect() as conn:
+        # The DID list is bound twice per statement, so halve the chunk.
+        dids = list(dict.fromkeys(user_dids))
+        for chunk in _chunked(dids, DID_CHUNK_SIZE // 2):
+            active.update(conn.execute(_ACTIVE_DIDS_QUERY, {"dids": chunk}).scalars())
+    return active
+
+
 def compute_window_summary(
-    engine: Engine, user_did: str, settings: Settings, now: Optional[datetime] = None
+    engine: Engine,
+    user_did: str,
+    settings: Settings,
+    now: Optional[datetime] = None,
+    *,
+    detail: bool = True,
 ) -> Optional[WindowSummary]:
     """Compute the rolling window summary for a participant."""
-    tz = pytz.timezone(settings.tz)
+    return compute_window_summaries_bulk(
+        engine, [user_did], settings, now=now, detail=detail
+    ).get(user_did)
+
+
+def compute_window_summaries_bulk(
+    engine: Engine,
+    user_dids: Iterable[str],
+    settings: Settings,
+    now: Optional[datetime] = None,
+    *,
+    detail: bool = True,
+) -> Dict[str, WindowSummary]:
+    """Compute rolling window summaries for many participants at once.
+
+    Activity for all DIDs is read with a handful of ``IN`` queries (chunked at
+    ``DID_CHUNK_SIZE``) over one connection instead of three queries per
+    participant. Participants without feed requests are omitted. With
+    ``detail=False`` only the window tally is computed and ``snapshots`` is
+    left empty.
+    """
+    tz = _get_tz(settings.tz)
     now = now or datetime.now(timezone.utc)
     now_local = now.astimezone(tz)
     current_study_day = _study_day_for_local(now_local, settings.cutoff_hour_local)
+    earliest_window_day = current_study_day - timedelta(days=settings.window_days - 1)
 
-    first_request_ts = _fetch_single_timestamp(
-        engine,
-        "SELECT MIN(timestamp) FROM feed_requests WHERE requester_did = :did",
-        user_did,
-    )
-    if first_request_ts is None:
-        return None
+    dids = list(dict.fromkeys(user_dids))
+    with engine.connect() as conn:
+        first_requests: Dict[str, datetime] = {}
+        for chunk in _chunked(dids):
+            for did, value in conn.execute(_FIRST_REQUESTS_QUERY, {"dids": chunk}):
+                if value is not None:
+                    first_requests[did] = _parse_timestamp(value)
+        if not first_requests:
+            return {}
+
+        window_starts: Dict[str, date] = {}
+        for did, first_request_ts in first_requests.items():
+            first_study_day = _study_day_for_utc(
+                first_request_ts, tz, settings.cutoff_hour_local
+            )
+            window_starts[did] = max(first_study_day, earliest_window_day)
+        active_dids = list(first_requests)
+        first_day = min(window_starts.values())
+        feed_rows, engagement_rows = _fetch_daily_counts(
+            conn,
+            active_dids,
+            tz,
+            settings.cutoff_hour_local,
+            first_day,
+            current_study_day,
+        )
 
-    first_study_day = _study_day_for_utc(
-        first_request_ts, tz, settings.cutoff_hour_local
-    )
-    window_start_day = max(
-        first_study_day, current_study_day - timedelta(days=settings.window_days - 1)
-    )
+    summaries: Dict[str, WindowSummary] = {}
+    for did in active_dids:
+        # Counts were fetched from the earliest window start across all DIDs;
+        # days before this participant's own window fall outside day_range.
+        day_range = _generate_day_range(window_starts[did], current_study_day)
+        if not day_range:
+            continue
+        day_index = _day_index(day_range)
+        retrieval_counts = _aggregate_counts(day_index, feed_rows.get(did, []))
+        if detail:
+            engagement_counts, engagement_breakdowns = _aggregate_engagement_counts(
+                day_index, engagement_rows.get(did, [])
+            )
+            snapshots = _build_snapshots(
+                day_range,
+                retrieval_counts,
+                engagement_counts,
+                engagement_breakdowns,
+                settings.window_days,
+                settings.required_active_days,
+            )
+            active_days = snapshots[-1].cumulative_active
+            on_track = snapshots[-1].on_track
+        else:
+            snapshots = []
+            engagement_totals = (
+                (day, count) for day, _, count in engagement_rows.get(did, [])
+            )
+            engagement_counts = _aggregate_counts(day_index, engagement_totals)
+            active_days, on_track = _tally_window(
+                retrieval_counts,
+                engagement_counts,
+                settings.window_days,
+                settings.required_active_days,
+            )
 
-    # Query bounds inclusive of start day and exclusive of the day after current day.
-    window_start_ts = _study_day_start(window_start_day, tz, settings.cutoff_hour_local)
-    window_end_ts = _study_day_start(
-        current_study_day + timedelta(days=1), tz, settings.cutoff_hour_local
-    )
+        summaries[did] = WindowSummary(
+            user_did=did,
+            snapshots=snapshots,
+            active_days=active_days,
+            required_active_days=settings.required_active_days,
+            window_days=settings.window_days,
+            on_track=on_track,
+            computed_at=now.astimezone(timezone.utc),
+        )
+    return summaries
 
-    feed_timestamps = _fetch_timestamps(
-        engine,
-        """
-        SELECT timestamp FROM feed_requests
-        WHERE requester_did = :did AND timestamp >= :start AND timestamp < :end
-        """,
-        user_did,
-        window_start_ts,
-        window_end_ts,
-    )
-    engagement_records = _fetch_engagement_records(
-        engine,
-        user_did,
-        window_start_ts,
-        window_end_ts,
-    )
 
-    day_range = _generate_day_range(window_start_day, current_study_day)
-    retrieval_counts = _aggregate_counts(
-        day_range, feed_timestamps, tz, settings.cutoff_hour_local
-    )
-    engagement_counts, engagement_breakdowns = _aggregate_engagement_counts(
-        day_range, engagement_records, tz, settings.cutoff_hour_local
-    )
+def _chunked(values: List[str], size: int = DID_CHUNK_SIZE) -> Iterator[List[str]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
 
-    snapshots = _build_snapshots(
-        day_range,
-        retrieval_counts,
-        engagement_counts,
-        engagement_breakdowns,
-        settings.window_days,
-        settings.required_active_days,
-    )
 
-    if not snapshots:
-        return None
-
-    active_days_total = snapshots[-1].cumulative_active
-    on_track = snapshots[-1].on_track
-    return WindowSummary(
-        user_did=user_did,
-        snapshots=snapshots,
-        active_days=active_days_total,
-        required_active_days=settings.required_active_days,
-        window_days=settings.window_days,
-        on_track=on_track,
-        computed_at=now.astimezone(timezone.utc),
-    )
+def _iso_bound(value: datetime) -> str:
+    """Format a whole-second UTC instant for comparison against TEXT timestamps.
 
+    Leaving off the offset makes the bound a prefix of every ISO spelling of
+    that instant ("Z", "+00:00", fractional seconds or naive UTC), so string
+    ``>=`` / ``<`` order matches instant order whichever one the table uses.
+    """
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
 
-def _fetch_single_timestamp(
-    engine: Engine, query: str, user_did: str
-) -> Optional[datetime]:
-    with engine.connect() as conn:
-        result = conn.execute(text(query), {"did": user_did})
-        value = result.scalar()
-    if value is None:
-        return None
-    return _parse_timestamp(value)
-
-
-def _fetch_timestamps(
-    engine: Engine, query: str, user_did: str, start: datetime, end: datetime
-) -> List[datetime]:
-    start_iso = start.astimezone(timezone.utc).isoformat()
-    end_iso = end.astimezone(timezone.utc).isoformat()
-    with engine.connect() as conn:
-        rows = conn.execute(
-            text(query),
-            {"did": user_did, "start": start_iso, "end": end_iso},
-        )
-        values = [row[0] for row in rows if row[0] is not None]
-    return [_parse_timestamp(value) for value in values]
 
+def _bucket_format(tz, first_day: date, last_day: date) -> str:
+    """Return the strftime format to group activity timestamps by.
 
-def _fetch_engagement_records(
-    engine: Engine, user_did: str, start: datetime, end: datetime
-) -> List[tuple[datetime, str]]:
-    start_iso = start.astimezone(timezone.utc).isoformat()
-    end_iso = end.astimezone(timezone.utc).isoformat()
-    with engine.connect() as conn:
-        rows = conn.execute(
-            text(
-                """
-                SELECT timestamp, engagement_type FROM engagements
-                WHERE did_engagement = :did
-                  AND timestamp >= :start AND timestamp < :end
-                """
-            ),
-            {"did": user_did, "start": start_iso, "end": end_iso},
+    The cut-off is a whole local hour, so a UTC hour lies within one study day
+    whenever the zone's offset is a whole number of hours across the range.
+    Zones with fractional offsets fall back to per-minute buckets.
+    """
+    for day in _generate_day_range(first_day, last_day + timedelta(days=1)):
+        if tz.utcoffset(datetime.combine(day, time(hour=12))) % timedelta(hours=1):
+            return MINUTE_BUCKET
+    return HOUR_BUCKET
+
+
+def _fetch_daily_counts(
+    conn: Connection,
+    dids: List[str],
+    tz,
+    cutoff_hour: int,
+    first_day: date,
+    last_day: date,
+) -> Tuple[
+    Dict[str, List[Tuple[date, int]]], Dict[str, List[Tuple[date, str, int]]]
+]:
+    """Return per-DID ``(study_day, count)`` feed and engagement counts.
+
+    Study-day boundaries are resolved to UTC once (DST included), so each
+    bucket is placed by bisecting those instants rather than converting it to
+    local time.
+    """
+    boundaries = [
+        _study_day_start(day, tz, cutoff_hour)
+        for day in _generate_day_range(first_day, last_day + timedelta(days=1))
+    ]
+    params: Dict[str, object] = {
+        "start": _iso_bound(boundaries[0]),
+        "end": _iso_bound(boundaries[-1]),
+        "bucket": _bucket_format(tz, first_day, last_day),
+    }
+    bucket_days: Dict[str, date] = {}
+
+    def study_day(value: str) -> date:
+        day = bucket_days.get(value)
+        if day is None:
+            offset = bisect_right(boundaries, _parse_timestamp(value)) - 1
+            day = first_day + timedelta(days=offset)
+            bucket_days[value] = day
+        return day
+
+    feed: Dict[str, List[Tuple[date, int]]] = defaultdict(list)
+    for did, value, _, count in _fetch_rows_by_did(
+        conn, _FEED_COUNTS_QUERY, dids, params
+    ):
+        if value is not None:
+            feed[did].append((study_day(value), count))
+    engagements: Dict[str, List[Tuple[date, str, int]]] = defaultdict(list)
+    for did, value, engagement_type, count in _fetch_rows_by_did(
+        conn, _ENGAGEMENT_COUNTS_QUERY, dids, params
+    ):
+        if value is not None:
+            engagements[did].append((study_day(value), str(engagement_type), count))
+    return feed, engagements
+
+
+def _fetch_rows_by_did(
+    conn: Connection, query: TextClause, dids: List[str], params: Dict[str, object]
+) -> Iterator[Sequence]:
+    """Stream ``query`` rows for ``dids`` in ``DID_CHUNK_SIZE`` IN-lists."""
+    for chunk in _chunked(dids):
+        yield from conn.execute(
+            query,
+            {"dids": chunk, **params},
+            execution_options={"yield_per": ROW_FETCH_SIZE},
         )
-        values = [
-            (row[0], row[1])
-            for row in rows
-            if row[0] is not None and row[1] is not None
-        ]
-    return [(_parse_timestamp(ts), str(et)) for ts, et in values]
 
 
 def _parse_timestamp(value: str) -> datetime:
-    dt = date_parser.isoparse(value)
+    try:
+        # Python 3.11's fromisoformat covers "Z", offsets and reduced precision.
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        from dateutil import parser as date_parser
+
+        dt = date_parser.isoparse(value)
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=timezone.utc)
     return dt.astimezone(timezone.utc)
 
 
+@lru_cache(maxsize=8)
+def _get_tz(name: str) -> ZoneInfo:
+    return ZoneInfo(name)
+
+
+@lru_cache(maxsize=24)
+def _cutoff(hour: int) -> time:
+    return time(hour=hour)
+
+
 def _study_day_for_utc(dt: datetime, tz, cutoff_hour: int) -> date:
     local_dt = dt.astimezone(tz)
     return _study_day_for_local(local_dt, cutoff_hour)
 
 
 def _study_day_for_local(local_dt: datetime, cutoff_hour: int) -> date:
-    cutoff = time(hour=cutoff_hour)
+    cutoff = _cutoff(cutoff_hour)
     day = local_dt.date()
-    if local_dt.timetz().replace(tzinfo=None) < cutoff:
+    if local_dt.time() < cutoff:
         day -= timedelta(days=1)
     return day
 
 
+@lru_cache(maxsize=1024)
 def _study_day_start(day: date, tz, cutoff_hour: int) -> datetime:
     """Return the UTC datetime representing the start of the study day."""
-    local_start = datetime.combine(day, time(hour=cutoff_hour), tzinfo=tz)
+    local_start = datetime.combine(day, _cutoff(cutoff_hour), tzinfo=tz)
     return local_start.astimezone(timezone.utc)
 
 
-def _generate_day_range(start_day: date, end_day: date) -> List[date]:
-    days = []
-    current = start_day
-    while current <= end_day:
-        days.append(current)
-        current += timedelta(days=1)
-    return days
+@lru_cache(maxsize=32)
+def _generate_day_range(start_day: date, end_day: date) -> Tuple[date, ...]:
+    # Most participants share a window, so the range is built once per run.
+    return tuple(
+        start_day + timedelta(days=offset)
+        for offset in range((end_day - start_day).days + 1)
+    )
+
+
+@lru_cache(maxsize=32)
+def _day_index(day_range: Tuple[date, ...]) -> Dict[date, int]:
+    # Shared between callers; treat the returned mapping as read-only.
+    return {day: index for index, day in enumerate(day_range)}
 
 
 def _aggregate_counts(
-    day_range: Sequence[date],
-    timestamps: Iterable[datetime],
-    tz,
-    cutoff_hour: int,
-) -> Dict[date, int]:
-    counts: Dict[date, int] = defaultdict(int)
-    for ts in timestamps:
-        day = _study_day_for_utc(ts, tz, cutoff_hour)
-        if day in day_range:
-            counts[day] += 1
-    # Ensure keys exist for all days.
-    for day in day_range:
-        counts.setdefault(day, 0)
+    day_index: Dict[date, int],
+    day_counts: Iterable[Tuple[date, int]],
+) -> List[int]:
+    counts = [0] * len(day_index)
+    for day, count in day_counts:
+        index = day_index.get(day)
+        if index is not None:
+            counts[index] += count
     return counts
 
 
 def _aggregate_engagement_counts(
-    day_range: Sequence[date],
-    records: Iterable[tuple[datetime, str]],
-    tz,
-    cutoff_hour: int,
-) -> tuple[Dict[date, int], Dict[date, Dict[str, int]]]:
-    total_counts: Dict[date, int] = defaultdict(int)
-    breakdown: Dict[date, Dict[str, int]] = {day: defaultdict(int) for day in day_range}
-
-    for ts, engagement_type in records:
-        day = _study_day_for_utc(ts, tz, cutoff_hour)
-        if day not in breakdown:
+    day_index: Dict[date, int],
+    records: Iterable[tuple[date, str, int]],
+) -> tuple[List[int], List[Dict[str, int]]]:
+    totals = [0] * len(day_index)
+    breakdown: List[Dict[str, int]] = [{} for _ in day_index]
+    for day, engagement_type, count in records:
+        index = day_index.get(day)
+        if index is None:
             continue
-        total_counts[day] += 1
-        breakdown[day][engagement_type] += 1
-
-    for day in day_range:
-        total_counts.setdefault(day, 0)
-        # Convert defaultdict to regular dict
-        breakdown[day] = dict(breakdown[day])
-
-    return total_counts, breakdown
+        totals[index] += count
+        by_type = breakdown[index]
+        by_type[engagement_type] = by_type.get(engagement_type, 0) + count
+    return totals, breakdown
 
 
 def get_daily_engagement_breakdown(
@@ -253,7 +394,33 @@ def get_daily_engagement_breakdown(
 ) -> List[DailySnapshot]:
     """Return per-day retrieval and engagement breakdown for a participant."""
 
-    tz = pytz.timezone(settings.tz)
+    return get_daily_engagement_breakdown_bulk(
+        engine,
+        [user_did],
+        settings,
+        start_day=start_day,
+        end_day=end_day,
+        now=now,
+    )[user_did]
+
+
+def get_daily_engagement_breakdown_bulk(
+    engine: Engine,
+    user_dids: Iterable[str],
+    settings: Settings,
+    *,
+    start_day: Optional[date] = None,
+    end_day: Optional[date] = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, List[DailySnapshot]]:
+    """Return per-day breakdowns for many participants, keyed by DID.
+
+    Every requested DID is present (in input order), with zero-activity days
+    when it has no rows. Activity is read with chunked ``IN`` queries over one
+    connection.
+    """
+
+    tz = _get_tz(settings.tz)
     now = now or datetime.now(timezone.utc)
     now_local = now.astimezone(tz)
     default_end_day = _study_day_for_local(now_local, settings.cutoff_hour_local)
@@ -263,69 +430,86 @@ def get_daily_engagement_breakdown(
     if start_day > end_day:
         raise ValueError("start_day must be on or before end_day")
 
-    window_start_ts = _study_day_start(start_day, tz, settings.cutoff_hour_local)
-    window_end_ts = _study_day_start(
-        end_day + timedelta(days=1), tz, settings.cutoff_hour_local
-    )
-
-    retrieval_timestamps = _fetch_timestamps(
-        engine,
-        """
-        SELECT timestamp FROM feed_requests
-        WHERE requester_did = :did AND timestamp >= :start AND timestamp < :end
-        """,
-        user_did,
-        window_start_ts,
-        window_end_ts,
-    )
-    engagement_records = _fetch_engagement_records(
-        engine,
-        user_did,
-        window_start_ts,
-        window_end_ts,
-    )
+    dids = list(dict.fromkeys(user_dids))
+    with engine.connect() as conn:
+        feed_rows, engagement_rows = _fetch_daily_counts(
+            conn, dids, tz, settings.cutoff_hour_local, start_day, end_day
+        )
 
     day_range = _generate_day_range(start_day, end_day)
-    retrieval_counts = _aggregate_counts(
-        day_range, retrieval_timestamps, tz, settings.cutoff_hour_local
-    )
-    engagement_counts, engagement_breakdowns = _aggregate_engagement_counts(
-        day_range, engagement_records, tz, settings.cutoff_hour_local
-    )
+    day_index = _day_index(day_range)
+    breakdowns: Dict[str, List[DailySnapshot]] = {}
+    for did in dids:
+        retrieval_counts = _aggregate_counts(day_index, feed_rows.get(did, []))
+        engagement_counts, engagement_breakdowns = _aggregate_engagement_counts(
+            day_index, engagement_rows.get(did, [])
+        )
+        breakdowns[did] = _build_snapshots(
+            day_range,
+            retrieval_counts,
+            engagement_counts,
+            engagement_breakdowns,
+            settings.window_days,
+            settings.required_active_days,
+        )
+    return breakdowns
 
-    snapshots = _build_snapshots(
-        day_range,
-        retrieval_counts,
-        engagement_counts,
-        engagement_breakdowns,
-        settings.window_days,
-        settings.required_active_days,
+
+def _is_active_day(retrievals: int, engagements: int) -> bool:
+    return retrievals >= 1 and engagements >= 3
+
+
+def _is_on_track(
+    cumulative_active: int,
+    days_passed: int,
+    active: bool,
+    window_days: int,
+    required_active_days: int,
+) -> bool:
+    remaining = max(window_days - days_passed, 0)
+    potential = cumulative_active + remaining
+    if not active:
+        potential += 1  # current day can still become active before cutoff
+    return potential >= required_active_days
+
+
+def _tally_window(
+    retrieval_counts: Sequence[int],
+    engagement_counts: Sequence[int],
+    window_days: int,
+    required_active_days: int,
+) -> Tuple[int, bool]:
+    """Return ``(active_days, on_track)`` as of the last day without snapshots."""
+    active_days = 0
+    active = False
+    for retrievals, engagements in zip(retrieval_counts, engagement_counts):
+        active = _is_active_day(retrievals, engagements)
+        active_days += active
+    on_track = _is_on_track(
+        active_days, len(retrieval_counts), active, window_days, required_active_days
     )
-    return snapshots
+    return active_days, on_track
 
 
 def _build_snapshots(
     day_range: Sequence[date],
-    retrieval_counts: Dict[date, int],
-    engagement_counts: Dict[date, int],
-    engagement_breakdowns: Dict[date, Dict[str, int]],
+    retrieval_counts: Sequence[int],
+    engagement_counts: Sequence[int],
+    engagement_breakdowns: Sequence[Dict[str, int]],
     window_days: int,
     required_active_days: int,
 ) -> List[DailySnapshot]:
     snapshots: List[DailySnapshot] = []
     cumulative_active = 0
     for index, day in enumerate(day_range):
-        retrievals = retrieval_counts.get(day, 0)
-        engagements = engagement_counts.get(day, 0)
-        active = retrievals >= 1 and engagements >= 3
+        retrievals = retrieval_counts[index]
+        engagements = engagement_counts[index]
+        active = _is_active_day(retrievals, engagements)
         if active:
             cumulative_active += 1
-        days_passed = index + 1
-        remaining = max(window_days - days_passed, 0)
-        potential = cumulative_active + remaining
-        if not active:
-            potential += 1  # current day can still become active before cutoff
-        on_track = potential >= required_active_days
+        on_track = _is_on_track(
+            cumulative_active, index + 1, active, window_days, required_active_days
+        )
         snapshots.append(
             DailySnapshot(
                 study_day=day,
@@ -334,7 +518,7 @@ def _build_snapshots(
                 active_day=active,
                 cumulative_active=cumulative_active,
                 on_track=on_track,
-                engagement_breakdown=engagement_breakdowns.get(day, {}),
+                engagement_breakdown=engagement_breakdowns[index],
             )
         )
     return snapshots
@@ -3,99 +3,82 @@
 from __future__ import annotations
 
 from copy import deepcopy
-from dataclasses import dataclass, field, replace
+from dataclasses import dataclass, field, fields, replace
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Optional
 import os
 
-from dotenv import load_dotenv
-
 BASE_DIR = Path(__file__).resolve().parents[1]
 ENV_PATH = BASE_DIR / ".env"
 DEFAULT_CONFIG_PATH = BASE_DIR / "app" / "default_config.yml"
 USER_CONFIG_PATH = BASE_DIR / "user_config.yml"
 
-# Load environment variables if a .env file exists.
-if ENV_PATH.exists():
-    load_dotenv(ENV_PATH)
-
-
-def _convert_scalar(value: str) -> Any:
-    value = value.strip()
-    if value in {"", "~", "null", "Null", "NULL"}:
-        return None
-    if value.startswith('"') and value.endswith('"'):
-        return value[1:-1]
-    if value.startswith("'") and value.endswith("'"):
-        return value[1:-1]
-    lowered = value.lower()
-    if lowered in {"true", "yes", "y", "on", "1"}:
-        return True
-    if lowered in {"false", "no", "n", "off", "0"}:
-        return False
-    try:
-        if value.startswith("0") and value != "0":
-            int(value, 10)
-        return int(value)
-    except ValueError:
-        pass
-    try:
-        return float(value)
-    except ValueError:
-        return value
+
+@lru_cache(maxsize=None)
+def _load_env_file() -> None:
+    """Load ``.env`` into the environment the first time a setting needs it."""
+    if ENV_PATH.exists():
+        from dotenv import load_dotenv
+
+        load_dotenv(ENV_PATH)
+
+
+def _getenv(name: str) -> Optional[str]:
+    _load_env_file()
+    return os.getenv(name)
 
 
 def _load_yaml(path: Path) -> Dict[str, Any]:
     if not path.exists():
         return {}
+    return _parse_yaml(path)
 
-    root: Dict[str, Any] = {}
-    stack: list[tuple[int, Dict[str, Any]]] = [(0, root)]
-    with path.open(encoding="utf-8") as fh:
-        for raw_line in fh:
-            line = raw_line.rstrip()
-            if not line:
-                continue
-            stripped = line.lstrip()
-            if not stripped or stripped.startswith("#"):
-                continue
-
-            indent = len(line) - len(stripped)
-            if indent % 2 != 0:
-                raise ValueError(f"Invalid indentation in {path}: '{line}'")
-
-            while stack and indent < stack[-1][0]:
-                stack.pop()
-            current = stack[-1][1] if stack else root
-
-            key, sep, value = stripped.partition(":")
-            key = key.strip()
-            if not sep:
-                raise ValueError(f"Missing ':' in config line: '{line}'")
-
-            value = value.strip()
-            if not value:
-                new_section: Dict[str, Any] = {}
-                current[key] = new_section
-                stack.append((indent + 2, new_section))
-            else:
-                current[key] = _convert_scalar(value)
 
-    return root
+def _parse_yaml(path: Path) -> Dict[str, Any]:
+    # Imported here so importing app.config (as the CLI does) never loads PyYAML.
+    import yaml
+
+    # libyaml's C loader when PyYAML was built with it, else the pure-Python one.
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with path.open(encoding="utf-8") as fh:
+        data = yaml.load(fh, Loader=loader)
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a mapping at the top level of {path}")
+    return data
 
 
 def _merge_config(base: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge ``overrides`` into ``base`` in place and return ``base``.
+
+    Nested sections of ``base`` are mutated too; ``_load_yaml`` parses fresh
+    dicts on every call, so the merged config owns every dict it touches.
+    """
     for key, value in overrides.items():
         if isinstance(value, dict) and isinstance(base.get(key), dict):
-            base[key] = _merge_config(dict(base[key]), value)
+            base[key] = _merge_config(base[key], value)
         else:
             base[key] = value
     return base
 
 
-CONFIG: Dict[str, Any] = {}
-CONFIG = _merge_config(CONFIG, _load_yaml(DEFAULT_CONFIG_PATH))
-CONFIG = _merge_config(CONFIG, _load_yaml(USER_CONFIG_PATH))
+@lru_cache(maxsize=None)
+def _config() -> Dict[str, Any]:
+    """Return the merged default and user YAML config, read on first use."""
+    config: Dict[str, Any] = {}
+    config = _merge_config(config, _load_yaml(DEFAULT_CONFIG_PATH))
+    return _merge_config(config, _load_yaml(USER_CONFIG_PATH))
+
+
+def __getattr__(name: str) -> Any:
+    # ``CONFIG`` stays importable without parsing YAML at import time, and is
+    # a read-only view so callers cannot change what ``_flat_config`` serves.
+    if name == "CONFIG":
+        return MappingProxyType(_config())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def _str_to_bool(value: Optional[str], *, default: bool = False) -> bool:
@@ -109,26 +92,48 @@ def _str_to_bool(value: Optional[str], *, default: bool = False) -> bool:
     return default
 
 
+def _resolved(path: Path) -> Path:
+    # Relative paths resolve against the working directory, so the cache is
+    # keyed on the absolute form rather than on ``path`` itself.
+    return _resolve_absolute(Path.cwd() / path.expanduser())
+
+
+@lru_cache(maxsize=None)
+def _resolve_absolute(path: Path) -> Path:
+    return path.resolve()
+
+
 def _default_path(env_var: str, fallback: Path) -> Path:
-    value = os.getenv(env_var)
+    value = _getenv(env_var)
     if value:
-        return Path(value).expanduser().resolve()
-    return fallback.resolve()
+        return _resolved(Path(value))
+    return _resolved(fallback)
+
+
+def _flatten(tree: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    flat: Dict[str, Any] = {}
+    for key, value in tree.items():
+        path = f"{prefix}{key}"
+        flat[path] = value
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{path}."))
+    return flat
+
+
+@lru_cache(maxsize=None)
+def _flat_config() -> Dict[str, Any]:
+    """Map every dotted config path (sections included) to its value."""
+    return _flatten(_config())
 
 
 def _config_get(path: str, default: Any = None) -> Any:
-    current: Any = CONFIG
-    for part in path.split("."):
-        if not isinstance(current, dict) or part not in current:
-            return default
-        current = current[part]
-    return current
+    return _flat_config().get(path, default)
 
 
 def _config_path(config_path: str, env_var: str, fallback: Path) -> Path:
     value = _config_get(config_path)
     if value:
-        return Path(value).expanduser().resolve()
+        return _resolved(Path(value))
     return _default_path(env_var, fallback)
 
 
@@ -136,7 +141,7 @@ def _config_int(config_path: str, env_var: str, default: int) -> int:
     value = _config_get(config_path)
     if value is not None:
         return int(value)
-    env_value = os.getenv(env_var)
+    env_value = _getenv(env_var)
     if env_value is not None:
         return int(env_value)
     return default
@@ -148,7 +153,7 @@ def _config_bool(config_path: str, env_var: str, default: bool) -> bool:
         return value
     if isinstance(value, str):
         return _str_to_bool(value, default=default)
-    env_value = os.getenv(env_var)
+    env_value = _getenv(env_var)
     return _str_to_bool(env_value, default=default)
 
 
@@ -158,7 +163,7 @@ def _config_optional_str(
     value = _config_get(config_path)
     if value is not None:
         return str(value)
-    env_value = os.getenv(env_var)
+    env_value = _getenv(env_var)
     if env_value is not None:
         return env_value
     return default
@@ -188,7 +193,7 @@ def _config_list(config_path: str, env_var: str, sep: str = ",") -> List[str]:
     if items:
         return items
 
-    env_value = os.getenv(env_var)
+    env_value = _getenv(env_var)
     if env_value:
         return [part.strip() for part in env_value.split(sep) if part.strip()]
     return []
@@ -201,89 +206,112 @@ def _config_str(config_path: str, env_var: str, default: str) -> str:
     return value
 
 
+def _setting(resolver: Callable[..., Any], *args: Any) -> Any:
+    """Declare a ``Settings`` field resolved when an instance is created."""
+    return field(default_factory=partial(resolver, *args))
+
+
 @dataclass
 class Settings:
     """Application settings loaded from environment variables."""
 
-    tz: str = _config_str("general.tz", "TZ", "Europe/Amsterdam")
-    compliance_db_path: Path = _config_path(
+    tz: str = _setting(_config_str, "general.tz", "TZ", "Europe/Amsterdam")
+    compliance_db_path: Path = _setting(
+        _config_path,
         "paths.compliance_db_path",
         "COMPLIANCE_DB_PATH",
         BASE_DIR.parent / "compliance-tracker" / "compliance.db",
     )
-    mail_db_path: Path = _config_path(
+    mail_db_path: Path = _setting(
+        _config_path,
         "paths.mail_db_path",
         "MAIL_DB_PATH",
         BASE_DIR / "mail.db" / "mail.sqlite",
     )
-    participants_csv_path: Path = _config_path(
+    participants_csv_path: Path = _setting(
+        _config_path,
         "paths.participants_csv_path",
         "PARTICIPANTS_CSV_PATH",
         BASE_DIR.parent / "data" / "participants.csv",
     )
-    window_days: int = _config_int("general.window_days", "WINDOW_DAYS", 14)
-    required_active_days: int = _config_int(
-        "general.required_active_days", "REQUIRED_ACTIVE_DAYS", 10
+    window_days: int = _setting(_config_int, "general.window_days", "WINDOW_DAYS", 14)
+    required_active_days: int = _setting(
+        _config_int, "general.required_active_days", "REQUIRED_ACTIVE_DAYS", 10
     )
-    cutoff_hour_local: int = _config_int(
-        "general.cutoff_hour_local", "CUTOFF_HOUR_LOCAL", 5
+    cutoff_hour_local: int = _setting(
+        _config_int, "general.cutoff_hour_local", "CUTOFF_HOUR_LOCAL", 5
+    )
+    send_hour_local: int = _setting(
+        _config_int, "general.send_hour_local", "SEND_HOUR_LOCAL", 9
     )
-    send_hour_local: int = _config_int("general.send_hour_local", "SEND_HOUR_LOCAL", 9)
 
-    smtp_host: str = _config_str("mailer.host", "SMTP_HOST", "localhost")
-    smtp_port: int = _config_int("mailer.port", "SMTP_PORT", 587)
-    smtp_username: Optional[str] = _config_optional_str(
-        "mailer.username", "SMTP_USERNAME"
+    smtp_host: str = _setting(_config_str, "mailer.host", "SMTP_HOST", "localhost")
+    smtp_port: int = _setting(_config_int, "mailer.port", "SMTP_PORT", 587)
+    smtp_username: Optional[str] = _setting(
+        _config_optional_str, "mailer.username", "SMTP_USERNAME"
+    )
+    smtp_password: Optional[str] = _setting(_getenv, "SMTP_PASSWORD")
+    smtp_use_ssl: bool = _setting(_config_bool, "mailer.use_ssl", "SMTP_USE_SSL", False)
+    smtp_from: str = _setting(
+        _config_str,
+        "mailer.from",
+        "SMTP_FROM",
+        "Bluesky Feed Project <noreply@example.com>",
     )
-    smtp_password: Optional[str] = os.getenv("SMTP_PASSWORD")
-    smtp_use_ssl: bool = _config_bool("mailer.use_ssl", "SMTP_USE_SSL", False)
-    smtp_from: str = _config_str(
-        "mailer.from", "SMTP_FROM", "Bluesky Feed Project <noreply@example.com>"
+    smtp_reply_to: Optional[str] = _setting(
+        _config_optional_str, "mailer.reply_to", "SMTP_REPLY_TO"
     )
-    smtp_reply_to: Optional[str] = _config_optional_str(
-        "mailer.reply_to", "SMTP_REPLY_TO"
+    smtp_dry_run: bool = _setting(_config_bool, "mailer.dry_run", "SMTP_DRY_RUN", True)
+    smtp_concurrency: int = _setting(
+        _config_int, "mailer.concurrency", "SMTP_CONCURRENCY", 1
     )
-    smtp_dry_run: bool = _config_bool("mailer.dry_run", "SMTP_DRY_RUN", True)
 
-    outbox_dir: Path = _config_path(
-        "paths.outbox_dir", "OUTBOX_DIR", BASE_DIR / "outbox"
+    outbox_dir: Path = _setting(
+        _config_path, "paths.outbox_dir", "OUTBOX_DIR", BASE_DIR / "outbox"
     )
-    send_log_path: Path = _config_path(
-        "paths.send_log_path", "SEND_LOG_PATH", BASE_DIR / "outbox" / "send_log.jsonl"
+    send_log_path: Path = _setting(
+        _config_path,
+        "paths.send_log_path",
+        "SEND_LOG_PATH",
+        BASE_DIR / "outbox" / "send_log.jsonl",
     )
-    mail_subject: str = _config_str(
-        "mailer.subject", "MAIL_SUBJECT", "Bluesky Feed Project: daily progress update"
+    mail_subject: str = _setting(
+        _config_str,
+        "mailer.subject",
+        "MAIL_SUBJECT",
+        "Bluesky Feed Project: daily progress update",
     )
-    qualtrics_base_url: Optional[str] = _config_optional_str(
-        "qualtrics.base_url", "QUALTRICS_BASE_URL"
+    qualtrics_base_url: Optional[str] = _setting(
+        _config_optional_str, "qualtrics.base_url", "QUALTRICS_BASE_URL"
     )
-    qualtrics_api_token: Optional[str] = os.getenv("QUALTRICS_API_TOKEN")
-    qualtrics_survey_filter: Optional[str] = _config_optional_str(
-        "qualtrics.survey_filter", "QUALTRICS_SURVEY_FILTER"
+    qualtrics_api_token: Optional[str] = _setting(_getenv, "QUALTRICS_API_TOKEN")
+    qualtrics_survey_filter: Optional[str] = _setting(
+        _config_optional_str, "qualtrics.survey_filter", "QUALTRICS_SURVEY_FILTER"
     )
-    qualtrics_survey_id: Optional[str] = _config_optional_str(
-        "qualtrics.survey_id", "QUALTRICS_SURVEY_ID"
+    qualtrics_survey_id: Optional[str] = _setting(
+        _config_optional_str, "qualtrics.survey_id", "QUALTRICS_SURVEY_ID"
     )
 
-    imap_host: Optional[str] = _config_optional_str("imap.host", "IMAP_HOST")
-    imap_port: int = _config_int("imap.port", "IMAP_PORT", 993)
-    imap_username: Optional[str] = _config_optional_str(
-        "imap.username", "IMAP_USERNAME"
+    imap_host: Optional[str] = _setting(_config_optional_str, "imap.host", "IMAP_HOST")
+    imap_port: int = _setting(_config_int, "imap.port", "IMAP_PORT", 993)
+    imap_username: Optional[str] = _setting(
+        _config_optional_str, "imap.username", "IMAP_USERNAME"
+    )
+    imap_password: Optional[str] = _setting(_getenv, "IMAP_PASSWORD")
+    imap_mailbox: str = _setting(_config_str, "imap.mailbox", "IMAP_MAILBOX", "INBOX")
+    imap_use_ssl: bool = _setting(_config_bool, "imap.use_ssl", "IMAP_USE_SSL", True)
+    imap_batch_size: int = _setting(
+        _config_int, "imap.batch_size", "IMAP_BATCH_SIZE", 500
     )
-    imap_password: Optional[str] = os.getenv("IMAP_PASSWORD")
-    imap_mailbox: str = _config_str("imap.mailbox", "IMAP_MAILBOX", "INBOX")
-    imap_use_ssl: bool = _config_bool("imap.use_ssl", "IMAP_USE_SSL", True)
 
-    feedgen_hostname: Optional[str] = _config_optional_str(
-        "services.feedgen_hostname", "FEEDGEN_HOSTNAME"
+    feedgen_hostname: Optional[str] = _setting(
+        _config_optional_str, "services.feedgen_hostname", "FEEDGEN_HOSTNAME"
     )
-    feedgen_listenhost: Optional[str] = _config_optional_str(
-        "services.feedgen_listenhost", "FEEDGEN_LISTENHOST"
+    feedgen_listenhost: Optional[str] = _setting(
+        _config_optional_str, "services.feedgen_listenhost", "FEEDGEN_LISTENHOST"
     )
 
-    requirements: Dict[str, Any] = field(
-        default_factory=lambda: _config_dict("requirements")
-    )
+    requirements: Dict[str, Any] = _setting(_config_dict, "requirements")
     qualtrics_survey_ids: List[str] = field(default_factory=list)
 
     def ensure_outbox(self) -> None:
@@ -300,40 +328,21 @@ class Settings:
         return replace(self, **overrides)
 
     def to_dict(self) -> Dict[str, Any]:
-        """Expose a dict representation for debugging/logging."""
-        return {
-            "tz": self.tz,
-            "compliance_db_path": str(self.compliance_db_path),
-            "mail_db_path": str(self.mail_db_path),
-            "participants_csv_path": str(self.participants_csv_path),
-            "window_days": self.window_days,
-            "required_active_days": self.required_active_days,
-            "cutoff_hour_local": self.cutoff_hour_local,
-            "send_hour_local": self.send_hour_local,
-            "smtp_host": self.smtp_host,
-            "smtp_port": self.smtp_port,
-            "smtp_username": self.smtp_username,
-            "smtp_use_ssl": self.smtp_use_ssl,
-            "smtp_from": self.smtp_from,
-            "smtp_reply_to": self.smtp_reply_to,
-            "smtp_dry_run": self.smtp_dry_run,
-            "outbox_dir": str(self.outbox_dir),
-            "send_log_path": str(self.send_log_path),
-            "mail_subject": self.mail_subject,
-            "qualtrics_base_url": self.qualtrics_base_url,
-            "qualtrics_api_token": bool(self.qualtrics_api_token),
-            "qualtrics_survey_filter": self.qualtrics_survey_filter,
-            "qualtrics_survey_id": self.qualtrics_survey_id,
-            "qualtrics_survey_ids": list(self.qualtrics_survey_ids),
-            "imap_host": self.imap_host,
-            "imap_port": self.imap_port,
-            "imap_username": self.imap_username,
-            "imap_mailbox": self.imap_mailbox,
-            "imap_use_ssl": self.imap_use_ssl,
-            "feedgen_hostname": self.feedgen_hostname,
-            "feedgen_listenhost": self.feedgen_listenhost,
-            "requirements": deepcopy(self.requirements),
-        }
+        """Expose a dict representation for debugging/logging.
+
+        Passwords are left out and the Qualtrics token is reported as a bool;
+        paths become strings and containers are copied.
+        """
+        data: Dict[str, Any] = {}
+        for name in _TO_DICT_FIELDS:
+            value = getattr(self, name)
+            if isinstance(value, Path):
+                value = str(value)
+            elif isinstance(value, (dict, list)):
+                value = deepcopy(value)
+            data[name] = value
+        data["qualtrics_api_token"] = bool(self.qualtrics_api_token)
+        return data
 
     def __post_init__(self) -> None:
         if not self.qualtrics_survey_ids:
@@ -344,3 +353,10 @@ class Settings:
                 self.qualtrics_survey_ids = [self.qualtrics_survey_id]
             else:
                 self.qualtrics_survey_ids = []
+
+
+# Settings fields never included in ``Settings.to_dict`` output.
+_SECRET_FIELDS = frozenset({"smtp_password", "imap_password"})
+_TO_DICT_FIELDS = tuple(
+    f.name for f in fields(Settings) if f.name not in _SECRET_FIELDS
+)
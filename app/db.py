@@ -4,14 +4,59 @@ from __future__ import annotations
 
 from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING
+import sqlite3
 
-from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+# Per-connection read tuning for the compliance store's large scans and
+# GROUP BYs: memory-mapped pages, a 64 MiB page cache and in-memory temp
+# b-trees. None of these touch the file, so they are safe in read-only mode.
+READ_PRAGMAS = (
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def get_engine(db_path: Path, *, read_only: bool = False) -> Engine:
+    """Return a cached SQLAlchemy engine for the given SQLite path.
+
+    Engines are cached per resolved path, so relative, ``..`` or symlinked
+    spellings of the same file share one engine and connection pool.
+
+    With ``read_only`` the file is opened via ``mode=ro`` so SQLite never takes
+    a write lock or creates journal files on a database owned by another
+    service. ``immutable=1`` is deliberately not used: the compliance store is
+    written to while we read it.
+    """
+    return _get_engine_cached(Path(db_path).resolve(), read_only)
 
 
 @lru_cache(maxsize=None)
-def get_engine(db_path: Path) -> Engine:
-    """Return a cached SQLAlchemy engine for the given SQLite path."""
+def _get_engine_cached(db_path: Path, read_only: bool) -> Engine:
+    from sqlalchemy import create_engine, event
+
     if not db_path.exists():
         raise FileNotFoundError(f"Compliance database not found at {db_path}")
-    return create_engine(f"sqlite:///{db_path}", future=True)
+    if not read_only:
+        engine = create_engine(f"sqlite:///{db_path}", future=True)
+    else:
+        uri = f"{db_path.as_uri()}?mode=ro"
+        engine = create_engine(
+            f"sqlite:///{db_path}",
+            future=True,
+            creator=lambda: sqlite3.connect(uri, uri=True, check_same_thread=False),
+        )
+    event.listen(engine, "connect", _configure_read_pragmas)
+    return engine
+
+
+def _configure_read_pragmas(dbapi_connection, _connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in READ_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
@@ -3,14 +3,17 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional, Tuple
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-
-from .compliance_snapshot import WindowSummary
 from .participants import Participant
 
+if TYPE_CHECKING:
+    from jinja2 import Environment, Template
+
+    from .compliance_snapshot import WindowSummary
+
 TEMPLATES_DIR = Path(__file__).resolve().parent / "templates" / "email"
 
 
@@ -21,7 +24,10 @@ class RenderedEmail:
     html_body: Optional[str] = None
 
 
+@lru_cache(maxsize=None)
 def _environment() -> Environment:
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+
     return Environment(
         loader=FileSystemLoader(str(TEMPLATES_DIR)),
         autoescape=select_autoescape(enabled_extensions=("html",)),
@@ -30,6 +36,31 @@ def _environment() -> Environment:
     )
 
 
+@lru_cache(maxsize=None)
+def _templates(non_compliant: bool) -> Tuple[Template, Optional[Template]]:
+    """Return the compiled text template and, if present, its HTML sibling.
+
+    Non-compliant participants get the ``daily_progress_noncompliant`` variant
+    when it exists. Resolved through Jinja's loader (no separate existence
+    checks) once per process and shared by every render (and thread).
+    """
+    from jinja2 import TemplateNotFound
+
+    env = _environment()
+    candidates = ["daily_progress.txt.j2"]
+    if non_compliant:
+        candidates.insert(0, "daily_progress_noncompliant.txt.j2")
+    text_template = env.select_template(candidates)
+    # Loader templates always carry their name; the fallback only narrows the type.
+    name = text_template.name or candidates[-1]
+    base_template = name.removesuffix(".txt.j2")
+    try:
+        html_template = env.get_template(f"{base_template}.html.j2")
+    except TemplateNotFound:
+        html_template = None
+    return text_template, html_template
+
+
 def render_daily_progress(
     summary: WindowSummary,
     participant: Participant,
@@ -37,7 +68,6 @@ def render_daily_progress(
     subject: str,
 ) -> RenderedEmail:
     """Render subject and bodies for the daily progress email."""
-    env = _environment()
     latest_snapshot = summary.snapshots[-1] if summary.snapshots else None
     non_compliant = False
     if latest_snapshot is not None:
@@ -45,13 +75,6 @@ def render_daily_progress(
             latest_snapshot.retrievals == 0 and latest_snapshot.engagements == 0
         )
 
-    base_template = "daily_progress"
-    if (
-        non_compliant
-        and (TEMPLATES_DIR / "daily_progress_noncompliant.txt.j2").exists()
-    ):
-        base_template = "daily_progress_noncompliant"
-
     context = {
         "participant": participant,
         "summary": summary,
@@ -59,13 +82,8 @@ def render_daily_progress(
         "latest_snapshot": latest_snapshot,
         "non_compliant": non_compliant,
     }
-    text_template = env.get_template(f"{base_template}.txt.j2")
+    text_template, html_template = _templates(non_compliant)
     text_body = text_template.render(context)
-
-    html_body = None
-    html_template_path = TEMPLATES_DIR / f"{base_template}.html.j2"
-    if html_template_path.exists():
-        html_template = env.get_template(f"{base_template}.html.j2")
-        html_body = html_template.render(context)
+    html_body = html_template.render(context) if html_template else None
 
     return RenderedEmail(subject=subject, text_body=text_body, html_body=html_body)
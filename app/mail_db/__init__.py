@@ -1,16 +1,22 @@
 """Helpers and metadata for the mail.db schema."""
 
-from .migrations import apply_migrations
-from .schema import (
-    SCHEMA_VERSION,
-    ALL_TABLES,
-    metadata,
-    daily_snapshots,
-    metadata_table,
-    participant_status_history,
-    participants,
-    send_attempts,
-)
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .migrations import apply_migrations
+    from .schema import (
+        SCHEMA_VERSION,
+        ALL_TABLES,
+        metadata,
+        daily_snapshots,
+        metadata_table,
+        participant_status_history,
+        participants,
+        send_attempts,
+    )
 
 __all__ = [
     "SCHEMA_VERSION",
@@ -23,3 +29,17 @@ __all__ = [
     "metadata_table",
     "apply_migrations",
 ]
+
+# Resolved on first access so importing ``app.mail_db.constants`` (as the CLI
+# does for its option choices) doesn't drag in SQLAlchemy.
+_LAZY_EXPORTS = {name: ".schema" for name in __all__}
+_LAZY_EXPORTS["apply_migrations"] = ".migrations"
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,10 @@
+"""Roster defaults shared by mail.db operations and the CLI.
+
+Kept free of SQLAlchemy so CLI option declarations can use them without
+loading the database stack.
+"""
+
+ALLOWED_STATUSES = frozenset({"active", "inactive", "unsubscribed"})
+DEFAULT_STATUS = "active"
+DEFAULT_TYPE = "pilot"
+DEFAULT_LANGUAGE = "en"
@@ -2,23 +2,70 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
-from typing import Callable, Dict
+from typing import Callable, Dict, Set
 
-from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
-from sqlalchemy.engine import Connection
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateIndex
 
 from .schema import (
     SCHEMA_VERSION,
     compliance_monitoring,
     metadata,
     metadata_table,
+    participants_email_lower_index,
+    send_attempts_recent_indexes,
 )
 
 
 MigrationFn = Callable[[Connection], None]
 
+_SCHEMA_VERSION_SQL = (
+    f"SELECT value FROM {metadata_table.name} WHERE key = 'schema_version'"
+)
+
+# Applied to every new mail.db connection. WAL with NORMAL sync turns each
+# commit into a sequential log append instead of a full fsync; the rest keeps
+# roster upserts and send-attempt scans in memory (64 MiB page cache,
+# memory-mapped reads, in-memory temp b-trees).
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+def get_mail_db_engine(db_path: Path) -> Engine:
+    """Return a cached SQLAlchemy engine for the mail.db path.
+
+    Engines are cached per resolved path, so every spelling of the same file
+    shares one engine. Its pool keeps connections open between operations
+    instead of reopening the database (and its WAL files) on every call.
+    """
+    return _get_mail_db_engine_cached(Path(db_path).resolve())
+
+
+@lru_cache(maxsize=None)
+def _get_mail_db_engine_cached(db_path: Path) -> Engine:
+    engine = create_engine(f"sqlite:///{db_path}", future=True)
+    event.listen(engine, "connect", _configure_sqlite_connection)
+    return engine
+
+
+def _configure_sqlite_connection(dbapi_connection, _connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in CONNECTION_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
 
 def _migration_001(conn: Connection) -> None:
     """Initial migration creating all tables in the schema."""
@@ -66,24 +113,39 @@ def _migration_005(conn: Connection) -> None:
         compliance_monitoring.create(conn)
 
 
+def _migration_006(conn: Connection) -> None:
+    """Index lower(email) so case-insensitive email lookups avoid a scan."""
+    # Reflection skips expression indexes, so let SQLite do the existence check.
+    conn.execute(CreateIndex(participants_email_lower_index, if_not_exists=True))
+
+
+def _migration_007(conn: Connection) -> None:
+    """Index send_attempts for newest-first lookups without a sort."""
+    for index in send_attempts_recent_indexes:
+        conn.execute(CreateIndex(index, if_not_exists=True))
+
+
 MIGRATIONS: Dict[int, MigrationFn] = {
     1: _migration_001,
     2: _migration_002,
     3: _migration_003,
     4: _migration_004,
     5: _migration_005,
+    6: _migration_006,
+    7: _migration_007,
 }
 
 
 def _get_current_version(conn: Connection) -> int:
     """Return the applied schema version for the open connection."""
-    inspector = inspect(conn)
-    if metadata_table.name not in inspector.get_table_names():
+    # One driver-level SELECT instead of reflecting the table list first; a
+    # brand-new database simply has no metadata table yet.
+    try:
+        result = conn.exec_driver_sql(_SCHEMA_VERSION_SQL).scalar_one_or_none()
+    except OperationalError as exc:
+        if "no such table" not in str(exc.orig):
+            raise
         return 0
-
-    result = conn.execute(
-        select(metadata_table.c.value).where(metadata_table.c.key == "schema_version")
-    ).scalar_one_or_none()
     if result is None:
         return 0
     try:
@@ -104,11 +166,27 @@ def _set_version(conn: Connection, version: int) -> None:
     conn.execute(stmt)
 
 
+# Resolved paths whose schema is known to be current in this process.
+_MIGRATED_PATHS: Set[Path] = set()
+
+
+def ensure_migrated(db_path: Path) -> None:
+    """Apply migrations for ``db_path`` unless this process already has.
+
+    Operations call this on every invocation, so after the first call per
+    file it is a set lookup instead of a transaction and schema probe.
+    """
+    resolved = Path(db_path).resolve()
+    if resolved in _MIGRATED_PATHS:
+        return
+    apply_migrations(resolved)
+
+
 def apply_migrations(db_path: Path) -> int:
     """Apply pending migrations for mail.db and return the current schema version."""
     db_path = Path(db_path)
     db_path.parent.mkdir(parents=True, exist_ok=True)
-    engine = create_engine(f"sqlite:///{db_path}", future=True)
+    engine = get_mail_db_engine(db_path)
 
     with engine.begin() as conn:
         conn.exec_driver_sql("PRAGMA foreign_keys = ON")
@@ -124,4 +202,5 @@ def apply_migrations(db_path: Path) -> int:
                 raise RuntimeError(f"No migration registered for version {version}.")
             migration(conn)
             _set_version(conn, version)
-        return SCHEMA_VERSION
+    _MIGRATED_PATHS.add(db_path.resolve())
+    return SCHEMA_VERSION
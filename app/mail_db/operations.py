@@ -3,22 +3,29 @@
 from __future__ import annotations
 
 import csv
+import itertools
 import json
+from contextlib import contextmanager
 from dataclasses import dataclass
-from datetime import datetime, timezone
-from functools import lru_cache
+from datetime import date, datetime, timezone
 from pathlib import Path
-from typing import Any, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from dateutil import parser as date_parser
 
-from sqlalchemy import create_engine, select, update
-from sqlalchemy.engine import Engine, Row
+from sqlalchemy import bindparam, or_, select, update
+from sqlalchemy.engine import Connection, Row
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.sql import func
 
-from .migrations import apply_migrations
+from .constants import (
+    ALLOWED_STATUSES,
+    DEFAULT_LANGUAGE,
+    DEFAULT_STATUS,
+    DEFAULT_TYPE,
+)
+from .migrations import ensure_migrated, get_mail_db_engine
 from .schema import (
     compliance_monitoring,
     participant_status_history,
@@ -26,10 +33,14 @@ from .schema import (
     send_attempts,
 )
 
-ALLOWED_STATUSES = {"active", "inactive", "unsubscribed"}
-DEFAULT_STATUS = "active"
-DEFAULT_TYPE = "pilot"
-DEFAULT_LANGUAGE = "en"
+# Keeps IN (...) lists under SQLite's default bound-parameter limit.
+IN_CLAUSE_CHUNK_SIZE = 500
+# Rows pulled per fetch when streaming send attempts.
+SEND_ATTEMPT_FETCH_SIZE = 256
+# Rows pulled per fetch when streaming the participant roster.
+ROSTER_FETCH_SIZE = 500
+# Audit CSV writes go out in a few large chunks instead of one per 8 KiB.
+CSV_WRITE_BUFFER_SIZE = 1024 * 1024
 CSV_FIELDNAMES = [
     "email",
     "did",
@@ -55,11 +66,18 @@ class SendAttemptNotFoundError(LookupError):
     """Raised when a send attempt entry cannot be found in mail.db."""
 
 
-@lru_cache(maxsize=None)
-def get_mail_db_engine(db_path: Path) -> Engine:
-    """Return a cached SQLAlchemy engine for the mail.db path."""
-    normalized = Path(db_path)
-    return create_engine(f"sqlite:///{normalized}", future=True)
+@contextmanager
+def mail_db_connection(db_path: Path) -> Iterator[Connection]:
+    """Yield one migrated mail.db connection for a multi-step job.
+
+    Callers commit each unit of work; anything left uncommitted is rolled back
+    when the block exits.
+    """
+
+    ensure_migrated(db_path)
+    engine = get_mail_db_engine(db_path)
+    with engine.connect() as conn:
+        yield conn
 
 
 @dataclass(frozen=True)
@@ -75,9 +93,25 @@ class StatusChangeResult:
 
 
 def _normalize_status(value: str) -> str:
+    # Callers almost always pass a canonical status already.
+    if value in ALLOWED_STATUSES:
+        return value
     return value.strip().lower()
 
 
+def _chunked(
+    values: List[Any], size: int = IN_CLAUSE_CHUNK_SIZE
+) -> Iterator[List[Any]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _chunked_iter(values: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(values)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
 @dataclass(frozen=True)
 class RosterUpsertResult:
     """Summary of participant roster upsert operations."""
@@ -96,6 +130,22 @@ class SendAttemptRecord:
     status: str
 
 
+@dataclass(frozen=True, slots=True)
+class ComplianceMonitoringRow:
+    """One cached compliance_monitoring entry (participant x study day)."""
+
+    snapshot_date: date
+    user_did: str
+    study_label: str
+    retrievals: int
+    engagements: int
+    engagement_breakdown: Any
+    active_day: int
+    cumulative_active: int
+    cumulative_skip: int
+    computed_at: datetime
+
+
 def seed_survey_completion(
     db_path: Path, *, participant_types: Iterable[str], completed_at: datetime
 ) -> List[str]:
@@ -104,7 +154,7 @@ def seed_survey_completion(
     Returns the list of participant DIDs that were updated.
     """
 
-    apply_migrations(db_path)
+    ensure_migrated(db_path)
     engine = get_mail_db_engine(db_path)
     normalized_types = [
         value.strip()
@@ -139,41 +189,65 @@ def seed_survey_completion(
     return target_dids
 
 
+def _compliance_params(row: ComplianceMonitoringRow | dict[str, Any]) -> dict[str, Any]:
+    if isinstance(row, ComplianceMonitoringRow):
+        row = {
+            "snapshot_date": row.snapshot_date,
+            "user_did": row.user_did,
+            "study_label": row.study_label,
+            "retrievals": row.retrievals,
+            "engagements": row.engagements,
+            "engagement_breakdown": row.engagement_breakdown,
+            "active_day": row.active_day,
+            "cumulative_active": row.cumulative_active,
+            "cumulative_skip": row.cumulative_skip,
+            "computed_at": row.computed_at,
+        }
+
+    breakdown = row.get("engagement_breakdown", {})
+    if isinstance(breakdown, str):
+        breakdown_json = breakdown
+    else:
+        breakdown_json = json.dumps(breakdown, sort_keys=True)
+
+    return {
+        "snapshot_date": row["snapshot_date"],
+        "user_did": row["user_did"],
+        "study_label": row["study_label"],
+        "retrievals": int(row.get("retrievals", 0)),
+        "engagements": int(row.get("engagements", 0)),
+        "engagement_breakdown": breakdown_json,
+        "active_day": int(bool(row.get("active_day"))),
+        "cumulative_active": int(row.get("cumulative_active", 0)),
+        "cumulative_skip": int(row.get("cumulative_skip", 0)),
+        "computed_at": row.get("computed_at", datetime.now(timezone.utc)),
+    }
+
+
 def upsert_compliance_monitoring_rows(
-    db_path: Path, rows: Iterable[dict[str, Any]]
+    db_path: Path, rows: Iterable[ComplianceMonitoringRow | dict[str, Any]]
 ) -> int:
-    """Upsert compliance monitoring cache rows into mail.db."""
+    """Upsert compliance monitoring cache rows into mail.db.
 
-    records: List[dict[str, Any]] = []
-    for row in rows:
-        breakdown = row.get("engagement_breakdown", {})
-        if isinstance(breakdown, str):
-            breakdown_json = breakdown
-        else:
-            breakdown_json = json.dumps(breakdown, sort_keys=True)
-
-        records.append(
-            {
-                "snapshot_date": row["snapshot_date"],
-                "user_did": row["user_did"],
-                "study_label": row["study_label"],
-                "retrievals": int(row.get("retrievals", 0)),
-                "engagements": int(row.get("engagements", 0)),
-                "engagement_breakdown": breakdown_json,
-                "active_day": int(bool(row.get("active_day"))),
-                "cumulative_active": int(row.get("cumulative_active", 0)),
-                "cumulative_skip": int(row.get("cumulative_skip", 0)),
-                "computed_at": row.get("computed_at", datetime.now(timezone.utc)),
-            }
-        )
+    Rows may be :class:`ComplianceMonitoringRow` instances or plain dicts. They
+    are bound in batches inside one transaction, so only one batch of
+    parameter dicts exists at a time.
+    """
 
-    if not records:
+    batches = (
+        [_compliance_params(row) for row in chunk]
+        for chunk in _chunked_iter(rows, IN_CLAUSE_CHUNK_SIZE)
+    )
+    first = next(batches, None)
+    if not first:
         return 0
 
-    apply_migrations(db_path)
+    ensure_migrated(db_path)
     engine = get_mail_db_engine(db_path)
 
-    stmt = sqlite_insert(compliance_monitoring).values(records)
+    # executemany keeps the statement's parameter count fixed; a multi-row
+    # VALUES list grows with the cache and hits SQLite's variable limit.
+    stmt = sqlite_insert(compliance_monitoring)
     stmt = stmt.on_conflict_do_update(
         index_elements=[
             compliance_monitoring.c.snapshot_date,
@@ -191,32 +265,49 @@ def upsert_compliance_monitoring_rows(
         },
     )
 
+    total = 0
     with engine.begin() as conn:
-        conn.execute(stmt)
+        for records in itertools.chain([first], batches):
+            conn.execute(stmt, records)
+            total += len(records)
 
-    return len(records)
+    return total
 
 
-def list_participants(db_path: Path) -> List[dict[str, str]]:
-    """Return the current participant roster as dictionaries."""
+def iter_participants(db_path: Path) -> Iterator[dict[str, str]]:
+    """Yield the participant roster as dictionaries, by email then DID.
+
+    Rows are fetched in batches and converted as they arrive, so callers that
+    consume the roster once never hold all of it in memory.
+    """
 
-    apply_migrations(db_path)
+    ensure_migrated(db_path)
     engine = get_mail_db_engine(db_path)
+
+    stmt = select(
+        participants.c.user_did,
+        participants.c.email,
+        participants.c.status,
+        participants.c.type,
+        participants.c.language,
+        participants.c.feed_url,
+        participants.c.survey_completed_at,
+        participants.c.prolific_id,
+        participants.c.study_type,
+    ).order_by(participants.c.email, participants.c.user_did)
+
     with engine.connect() as conn:
-        rows = conn.execute(select(participants)).mappings().all()
-
-    roster: List[dict[str, str]] = []
-    for row in rows:
-        completed_value = row.get("survey_completed_at")
-        if isinstance(completed_value, str):
-            completed_iso = completed_value.strip()
-        elif completed_value is not None:
-            completed_iso = completed_value.astimezone(timezone.utc).isoformat()
-        else:
-            completed_iso = ""
+        result = conn.execution_options(yield_per=ROSTER_FETCH_SIZE).execute(stmt)
+        for row in result.mappings():
+            completed_value = row.get("survey_completed_at")
+            if isinstance(completed_value, str):
+                completed_iso = completed_value.strip()
+            elif completed_value is not None:
+                completed_iso = completed_value.astimezone(timezone.utc).isoformat()
+            else:
+                completed_iso = ""
 
-        roster.append(
-            {
+            yield {
                 "did": row["user_did"],
                 "email": row.get("email", ""),
                 "status": row.get("status", DEFAULT_STATUS),
@@ -227,37 +318,112 @@ def list_participants(db_path: Path) -> List[dict[str, str]]:
                 "prolific_id": row.get("prolific_id") or "",
                 "study_type": row.get("study_type") or "",
             }
+
+
+def list_participants(db_path: Path) -> List[dict[str, str]]:
+    """Return the current participant roster as dictionaries, by email then DID."""
+
+    return list(iter_participants(db_path))
+
+
+def list_participant_dids(db_path: Path) -> List[str]:
+    """Return every roster DID, for callers that don't need the full rows."""
+
+    ensure_migrated(db_path)
+    engine = get_mail_db_engine(db_path)
+    with engine.connect() as conn:
+        return list(
+            conn.execute(
+                select(participants.c.user_did).order_by(participants.c.user_did)
+            ).scalars()
         )
 
-    roster.sort(key=lambda item: (item["email"], item["did"]))
-    return roster
+
+# Per-call lookups are built once here; execute() binds the b_* parameters.
+_PARTICIPANT_BY_EMAIL = (
+    select(participants.c.participant_id, participants.c.user_did)
+    .where(func.lower(participants.c.email) == bindparam("b_email"))
+    .limit(1)
+)
+_PARTICIPANT_ID_BY_DID = select(participants.c.participant_id).where(
+    participants.c.user_did == bindparam("b_user_did")
+)
+_PARTICIPANT_STATUS_BY_DID = select(
+    participants.c.participant_id, participants.c.status
+).where(participants.c.user_did == bindparam("b_user_did"))
 
 
 def find_participant_by_email(db_path: Path, email: str) -> Optional[Tuple[int, str]]:
     """Return participant_id and user_did for the given email address."""
 
-    apply_migrations(db_path)
+    ensure_migrated(db_path)
     engine = get_mail_db_engine(db_path)
     normalized = email.strip().lower()
     with engine.connect() as conn:
-        row = conn.execute(
-            select(
-                participants.c.participant_id,
-                participants.c.user_did,
-                participants.c.email,
-            )
-            .where(func.lower(participants.c.email) == normalized)
-            .limit(1)
-        ).first()
+        row = conn.execute(_PARTICIPANT_BY_EMAIL, {"b_email": normalized}).first()
     if row is None:
         return None
     return row.participant_id, row.user_did
 
 
+def participant_exists(db_path: Path, user_did: str) -> bool:
+    """Return True when the roster already contains ``user_did``."""
+
+    ensure_migrated(db_path)
+    engine = get_mail_db_engine(db_path)
+    with engine.connect() as conn:
+        participant_id = conn.execute(
+            _PARTICIPANT_ID_BY_DID, {"b_user_did": user_did.strip()}
+        ).scalar()
+    return participant_id is not None
+
+
+def find_participants_by_emails(
+    db_path: Path,
+    emails: Iterable[str],
+    *,
+    conn: Optional[Connection] = None,
+) -> Dict[str, Tuple[int, str]]:
+    """Return ``{email: (participant_id, user_did)}`` for all matching addresses.
+
+    Lookups are case-insensitive and keyed by the lowercased address; unknown
+    addresses are omitted. Pass ``conn`` (see :func:`mail_db_connection`) to
+    reuse an open connection.
+    """
+
+    normalized = sorted({email.strip().lower() for email in emails if email.strip()})
+    if not normalized:
+        return {}
+    if conn is not None:
+        return _find_participants_in_conn(conn, normalized)
+
+    ensure_migrated(db_path)
+    engine = get_mail_db_engine(db_path)
+    with engine.connect() as conn:
+        return _find_participants_in_conn(conn, normalized)
+
+
+def _find_participants_in_conn(
+    conn: Connection, emails: List[str]
+) -> Dict[str, Tuple[int, str]]:
+    email_lc = func.lower(participants.c.email)
+    matches: Dict[str, Tuple[int, str]] = {}
+    for chunk in _chunked(emails):
+        rows = conn.execute(
+            select(
+                participants.c.participant_id,
+                participants.c.user_did,
+                email_lc.label("email_lc"),
+            ).where(email_lc.in_(chunk))
+        )
+        for row in rows:
+            matches.setdefault(row.email_lc, (row.participant_id, row.user_did))
+    return matches
+
+
 def export_participants_to_csv(db_path: Path, csv_path: Path) -> None:
     """Append new participants from mail.db to the audit CSV without rewriting history."""
 
-    rows = list_participants(db_path)
     csv_path.parent.mkdir(parents=True, exist_ok=True)
 
     existing_fieldnames: List[str] = []
@@ -282,7 +448,9 @@ def export_participants_to_csv(db_path: Path, csv_path: Path) -> None:
     if missing_fields or not csv_path.exists():
         for field in missing_fields:
             existing_fieldnames.append(field)
-        with csv_path.open("w", encoding="utf-8", newline="") as handle:
+        with csv_path.open(
+            "w", encoding="utf-8", newline="", buffering=CSV_WRITE_BUFFER_SIZE
+        ) as handle:
             writer = csv.DictWriter(
                 handle,
                 fieldnames=existing_fieldnames,
@@ -293,151 +461,298 @@ def export_participants_to_csv(db_path: Path, csv_path: Path) -> None:
                 sanitized = {field: row.get(field, "") for field in existing_fieldnames}
                 writer.writerow(sanitized)
 
-    new_records: List[dict[str, str]] = []
-    for row in rows:
-        did = (row.get("did") or "").strip()
-        if not did or did in existing_dids:
-            continue
-        record = {
-            "email": row.get("email", ""),
-            "did": did,
-            "status": row.get("status", DEFAULT_STATUS),
-            "type": row.get("type", DEFAULT_TYPE),
-            "feed_url": row.get("feed_url", ""),
-            "survey_completed_at": row.get("survey_completed_at", ""),
-            "prolific_id": row.get("prolific_id", ""),
-            "study_type": row.get("study_type", ""),
-            "audit_timestamp": datetime.now(timezone.utc).isoformat(),
-        }
-        new_records.append(record)
-        existing_dids.add(did)
+    # Roster rows carry every CSV_FIELDNAMES key; other audit columns stay blank.
+    columns = [
+        field if field in CSV_FIELDNAMES else None for field in existing_fieldnames
+    ]
+    audit_timestamp = datetime.now(timezone.utc).isoformat()
+    with csv_path.open(
+        "a", encoding="utf-8", newline="", buffering=CSV_WRITE_BUFFER_SIZE
+    ) as handle:
+        row_writer = csv.writer(handle)
+        for row in iter_participants(db_path):
+            did = (row["did"] or "").strip()
+            if not did or did in existing_dids:
+                continue
+            row["did"] = did
+            row["audit_timestamp"] = audit_timestamp
+            row_writer.writerow([row[column] if column else "" for column in columns])
+            existing_dids.add(did)
+
+
+def _roster_values(record: dict[str, str]) -> dict[str, Any]:
+    """Normalise one roster record into participant column values."""
+    completed_raw = (record.get("survey_completed_at") or "").strip()
+    completed_dt: Optional[datetime] = None
+    if completed_raw:
+        try:
+            parsed_dt = date_parser.parse(completed_raw)
+            if not parsed_dt.tzinfo:
+                parsed_dt = parsed_dt.replace(tzinfo=timezone.utc)
+            completed_dt = parsed_dt.astimezone(timezone.utc)
+        except (ValueError, TypeError):
+            completed_dt = None
+
+    return {
+        "user_did": record.get("did", "").strip(),
+        "email": (record.get("email") or "").strip(),
+        "status": (record.get("status") or DEFAULT_STATUS).strip() or DEFAULT_STATUS,
+        "type": (record.get("type") or DEFAULT_TYPE).strip() or DEFAULT_TYPE,
+        "language": (record.get("language") or DEFAULT_LANGUAGE).strip()
+        or DEFAULT_LANGUAGE,
+        "feed_url": (record.get("feed_url") or "").strip(),
+        "prolific_id": (record.get("prolific_id") or "").strip(),
+        "study_type": (record.get("study_type") or "").strip(),
+        "survey_completed_at": completed_dt,
+    }
+
+
+def _roster_changes(existing: Any, values: dict[str, Any]) -> dict[str, Any]:
+    """Return the columns a roster record may change; status is never touched."""
+    update_values: dict[str, Any] = {}
+
+    if values["email"] and values["email"] != (existing.get("email") or ""):
+        update_values["email"] = values["email"]
+
+    if values["type"] and values["type"] != (existing.get("type") or DEFAULT_TYPE):
+        update_values["type"] = values["type"]
+
+    if values["language"] and values["language"] != (
+        existing.get("language") or DEFAULT_LANGUAGE
+    ):
+        update_values["language"] = values["language"]
+
+    if values["feed_url"] and values["feed_url"] != (existing.get("feed_url") or ""):
+        update_values["feed_url"] = values["feed_url"]
+
+    if values["prolific_id"] and values["prolific_id"] != (
+        existing.get("prolific_id") or ""
+    ):
+        update_values["prolific_id"] = values["prolific_id"]
+
+    if values["study_type"] and values["study_type"] != (
+        existing.get("study_type") or ""
+    ):
+        update_values["study_type"] = values["study_type"]
+
+    if values["survey_completed_at"] and not existing.get("survey_completed_at"):
+        update_values["survey_completed_at"] = values["survey_completed_at"]
+
+    return update_values
+
+
+# Columns a roster sync may rewrite; status is owned by manual overrides.
+_ROSTER_UPDATE_COLUMNS = (
+    "email",
+    "type",
+    "language",
+    "feed_url",
+    "prolific_id",
+    "study_type",
+    "survey_completed_at",
+)
 
-    if not new_records:
-        return
 
-    with csv_path.open("a", encoding="utf-8", newline="") as handle:
-        writer = csv.DictWriter(
-            handle,
-            fieldnames=existing_fieldnames,
-            extrasaction="ignore",
+def _roster_assignments(new: Any) -> tuple[dict[str, Any], Any]:
+    """Return the SET clause and WHERE guard mirroring :func:`_roster_changes`.
+
+    ``new`` maps a column name to the SQL expression holding the incoming
+    value. Blank values keep the stored one, ``survey_completed_at`` is only
+    filled in once, and rows whose values would not change are left alone.
+    """
+    assignments: dict[str, Any] = {
+        column: func.coalesce(func.nullif(new(column), ""), participants.c[column])
+        for column in _ROSTER_UPDATE_COLUMNS
+    }
+    assignments["survey_completed_at"] = func.coalesce(
+        participants.c.survey_completed_at, new("survey_completed_at")
+    )
+    changed = or_(
+        *(
+            participants.c[column].is_distinct_from(expression)
+            for column, expression in assignments.items()
         )
-        for record in new_records:
-            sanitized = {field: record.get(field, "") for field in existing_fieldnames}
-            writer.writerow(sanitized)
+    )
+    return {**assignments, "updated_at": func.now()}, changed
+
+
+def _build_roster_upsert() -> Any:
+    stmt = sqlite_insert(participants)
+    set_, changed = _roster_assignments(lambda column: stmt.excluded[column])
+    return stmt.on_conflict_do_update(
+        index_elements=[participants.c.user_did], set_=set_, where=changed
+    )
+
+
+def _build_roster_update() -> Any:
+    # Wrapped in coalesce/nullif the parameters can't infer a column type, so
+    # pass it explicitly to keep DateTime values in SQLAlchemy's storage format.
+    set_, changed = _roster_assignments(
+        lambda column: bindparam(f"b_{column}", type_=participants.c[column].type)
+    )
+    return (
+        update(participants)
+        .where(participants.c.user_did == bindparam("b_user_did"))
+        .where(changed)
+        .values(set_)
+    )
+
+
+_ROSTER_UPSERT = _build_roster_upsert()
+# Records without an email may refresh an existing participant but never add one.
+_ROSTER_UPDATE = _build_roster_update()
+
+
+def _upsert_roster_batch(conn: Connection, batch: List[dict[str, Any]]) -> int:
+    """Apply one batch of normalised roster values; return the rows touched.
+
+    SQLite decides insert versus update per row, so no existing rows are read.
+    """
+    folded: dict[str, dict[str, Any]] = {}
+    for values in batch:
+        user_did = values["user_did"]
+        if user_did in folded:
+            # Repeated DID within the batch: fold it into the first record.
+            folded[user_did].update(_roster_changes(folded[user_did], values))
+        else:
+            folded[user_did] = dict(values)
+
+    upserts: List[dict[str, Any]] = []
+    updates: List[dict[str, Any]] = []
+    for values in folded.values():
+        if values["email"]:
+            upserts.append(
+                {
+                    **values,
+                    "feed_url": values["feed_url"] or None,
+                    "prolific_id": values["prolific_id"] or None,
+                    "study_type": values["study_type"] or None,
+                }
+            )
+        else:
+            params = {f"b_{c}": values[c] for c in _ROSTER_UPDATE_COLUMNS}
+            params["b_user_did"] = values["user_did"]
+            updates.append(params)
+
+    # SQLite counts both inserted and conflict-updated rows in rowcount.
+    touched = 0
+    if upserts:
+        touched += conn.execute(_ROSTER_UPSERT, upserts).rowcount
+    if updates:
+        touched += conn.execute(_ROSTER_UPDATE, updates).rowcount
+    return touched
 
 
 def upsert_participants(
     db_path: Path, records: Iterable[dict[str, str]]
 ) -> RosterUpsertResult:
-    """Upsert participant records, preserving manual status overrides."""
+    """Upsert participant records, preserving manual status overrides.
 
-    apply_migrations(db_path)
+    ``records`` is consumed lazily and written in batches of
+    ``IN_CLAUSE_CHUNK_SIZE`` rows, one transaction per batch, so large rosters
+    can be streamed without being held in memory.
+    """
+
+    ensure_migrated(db_path)
     engine = get_mail_db_engine(db_path)
+    count_participants = select(func.count()).select_from(participants)
+    with engine.connect() as conn:
+        before = conn.execute(count_participants).scalar() or 0
 
-    inserted = 0
-    updated = 0
+    touched = 0
+    batch: List[dict[str, Any]] = []
 
-    record_list = [record for record in records if record.get("did")]
-    if not record_list:
-        with engine.connect() as conn:
-            total = conn.execute(
-                select(func.count()).select_from(participants)
-            ).scalar()
-        return RosterUpsertResult(inserted=0, updated=0, total=total or 0)
+    def flush() -> None:
+        nonlocal touched
+        with engine.begin() as conn:
+            touched += _upsert_roster_batch(conn, batch)
+        batch.clear()
 
-    with engine.begin() as conn:
-        existing_rows = conn.execute(select(participants)).mappings().all()
-        existing_map = {row["user_did"]: row for row in existing_rows}
+    for record in records:
+        if not record.get("did"):
+            continue
+        values = _roster_values(record)
+        if not values["user_did"]:
+            continue
+        batch.append(values)
+        if len(batch) >= IN_CLAUSE_CHUNK_SIZE:
+            flush()
+    if batch:
+        flush()
 
-        for record in record_list:
-            user_did = record.get("did", "").strip()
-            if not user_did:
-                continue
+    with engine.connect() as conn:
+        total = conn.execute(count_participants).scalar() or 0
 
-            new_email = (record.get("email") or "").strip()
-            new_type = (record.get("type") or DEFAULT_TYPE).strip() or DEFAULT_TYPE
-            new_language = (
-                record.get("language") or DEFAULT_LANGUAGE
-            ).strip() or DEFAULT_LANGUAGE
-            status_value = (
-                record.get("status") or DEFAULT_STATUS
-            ).strip() or DEFAULT_STATUS
-            new_feed_url = (record.get("feed_url") or "").strip()
-            new_prolific_id = (record.get("prolific_id") or "").strip()
-            new_study_type = (record.get("study_type") or "").strip()
-            completed_raw = (record.get("survey_completed_at") or "").strip()
-            completed_dt: Optional[datetime] = None
-            if completed_raw:
-                try:
-                    parsed_dt = date_parser.parse(completed_raw)
-                    if not parsed_dt.tzinfo:
-                        parsed_dt = parsed_dt.replace(tzinfo=timezone.utc)
-                    completed_dt = parsed_dt.astimezone(timezone.utc)
-                except (ValueError, TypeError):
-                    completed_dt = None
-
-            existing = existing_map.get(user_did)
-            if existing:
-                update_values: dict[str, Any] = {}
-
-                if new_email and new_email != (existing.get("email") or ""):
-                    update_values["email"] = new_email
-
-                if new_type and new_type != (existing.get("type") or DEFAULT_TYPE):
-                    update_values["type"] = new_type
-
-                if new_language and new_language != (
-                    existing.get("language") or DEFAULT_LANGUAGE
-                ):
-                    update_values["language"] = new_language
-
-                if new_feed_url and new_feed_url != (existing.get("feed_url") or ""):
-                    update_values["feed_url"] = new_feed_url
-
-                if new_prolific_id and new_prolific_id != (
-                    existing.get("prolific_id") or ""
-                ):
-                    update_values["prolific_id"] = new_prolific_id
-
-                if new_study_type and new_study_type != (
-                    existing.get("study_type") or ""
-                ):
-                    update_values["study_type"] = new_study_type
-
-                if completed_dt and not existing.get("survey_completed_at"):
-                    update_values["survey_completed_at"] = completed_dt
-
-                if update_values:
-                    update_values["updated_at"] = func.now()
-                    conn.execute(
-                        update(participants)
-                        .where(
-                            participants.c.participant_id == existing["participant_id"]
-                        )
-                        .values(**update_values)
-                    )
-                    updated += 1
-            else:
-                if not new_email:
-                    continue
-                conn.execute(
-                    participants.insert().values(
-                        user_did=user_did,
-                        email=new_email,
-                        status=status_value,
-                        type=new_type,
-                        language=new_language,
-                        feed_url=new_feed_url or None,
-                        prolific_id=new_prolific_id or None,
-                        study_type=new_study_type or None,
-                        survey_completed_at=completed_dt,
-                    )
-                )
-                inserted += 1
+    # Rows are never deleted here, so growth is exactly the inserted count.
+    inserted = total - before
+    return RosterUpsertResult(
+        inserted=inserted, updated=touched - inserted, total=total
+    )
+
+
+def find_participant_ids(db_path: Path, user_dids: Iterable[str]) -> Dict[str, int]:
+    """Return ``{user_did: participant_id}`` for every DID present in the roster.
+
+    Lets a send loop resolve its recipients once and then record attempts with
+    :func:`record_send_attempt_by_id`.
+    """
+
+    dids = sorted({did for did in user_dids if did})
+    if not dids:
+        return {}
+
+    ensure_migrated(db_path)
+    engine = get_mail_db_engine(db_path)
+    with engine.connect() as conn:
+        return _participant_ids_in_conn(conn, dids)
+
+
+def _participant_ids_in_conn(conn: Connection, dids: List[str]) -> Dict[str, int]:
+    ids: Dict[str, int] = {}
+    for chunk in _chunked(dids):
+        rows = conn.execute(
+            select(participants.c.user_did, participants.c.participant_id).where(
+                participants.c.user_did.in_(chunk)
+            )
+        )
+        ids.update({row.user_did: row.participant_id for row in rows})
+    return ids
 
-        total = conn.execute(select(func.count()).select_from(participants)).scalar()
 
-    return RosterUpsertResult(inserted=inserted, updated=updated, total=total or 0)
+_INSERT_SEND_ATTEMPT = send_attempts.insert()
+_UPDATE_SEND_ATTEMPT = (
+    update(send_attempts)
+    .where(send_attempts.c.attempt_id == bindparam("b_attempt_id"))
+    .values(status=bindparam("b_status"), smtp_response=bindparam("b_response"))
+)
+
+
+def _insert_send_attempt(
+    conn: Connection,
+    *,
+    participant_id: int,
+    message_type: str,
+    mode: str,
+    status: str,
+    template_version: Optional[str],
+    smtp_response: Optional[str],
+) -> SendAttemptRecord:
+    result = conn.execute(
+        _INSERT_SEND_ATTEMPT,
+        {
+            "participant_id": participant_id,
+            "message_type": message_type,
+            "mode": mode,
+            "status": status,
+            "smtp_response": smtp_response,
+            "template_version": template_version,
+        },
+    )
+    return SendAttemptRecord(
+        attempt_id=result.inserted_primary_key[0],
+        participant_id=participant_id,
+        status=status,
+    )
 
 
 def record_send_attempt(
@@ -452,37 +767,104 @@ def record_send_attempt(
 ) -> SendAttemptRecord:
     """Insert a new row into send_attempts for the given participant."""
 
-    apply_migrations(db_path)
+    ensure_migrated(db_path)
     engine = get_mail_db_engine(db_path)
 
     with engine.begin() as conn:
-        participant_row = conn.execute(
-            select(participants.c.participant_id, participants.c.status).where(
-                participants.c.user_did == user_did
-            )
-        ).first()
-        if participant_row is None:
+        participant_id = conn.execute(
+            _PARTICIPANT_ID_BY_DID, {"b_user_did": user_did}
+        ).scalar_one_or_none()
+        if participant_id is None:
             raise ParticipantNotFoundError(
                 f"Participant with DID {user_did!r} not found in mail.db"
             )
 
-        result = conn.execute(
-            send_attempts.insert().values(
-                participant_id=participant_row.participant_id,
-                message_type=message_type,
-                mode=mode,
-                status=status,
-                smtp_response=smtp_response,
-                template_version=template_version,
-            )
+        return _insert_send_attempt(
+            conn,
+            participant_id=participant_id,
+            message_type=message_type,
+            mode=mode,
+            status=status,
+            template_version=template_version,
+            smtp_response=smtp_response,
         )
-        attempt_id = result.inserted_primary_key[0]
 
-    return SendAttemptRecord(
-        attempt_id=attempt_id,
-        participant_id=participant_row.participant_id,
-        status=status,
-    )
+
+def record_send_attempt_by_id(
+    db_path: Path,
+    *,
+    participant_id: int,
+    message_type: str,
+    mode: str,
+    status: str,
+    template_version: Optional[str] = None,
+    smtp_response: Optional[str] = None,
+) -> SendAttemptRecord:
+    """Like :func:`record_send_attempt` for an already-resolved participant_id."""
+
+    ensure_migrated(db_path)
+    engine = get_mail_db_engine(db_path)
+
+    with engine.begin() as conn:
+        return _insert_send_attempt(
+            conn,
+            participant_id=participant_id,
+            message_type=message_type,
+            mode=mode,
+            status=status,
+            template_version=template_version,
+            smtp_response=smtp_response,
+        )
+
+
+def record_send_attempts_bulk(
+    db_path: Path, rows: Iterable[dict[str, Any]]
+) -> List[SendAttemptRecord]:
+    """Bulk variant of :func:`record_send_attempt` using one transaction.
+
+    Each row holds ``user_did``, ``message_type``, ``mode`` and ``status`` plus
+    optional ``template_version`` and ``smtp_response``. Rows for unknown DIDs
+    are skipped; records are returned in input order for the rest.
+    """
+
+    rows = list(rows)
+    if not rows:
+        return []
+
+    ensure_migrated(db_path)
+    engine = get_mail_db_engine(db_path)
+
+    with engine.begin() as conn:
+        ids = _participant_ids_in_conn(conn, sorted({row["user_did"] for row in rows}))
+        params = [
+            {
+                "participant_id": ids[row["user_did"]],
+                "message_type": row["message_type"],
+                "mode": row["mode"],
+                "status": row["status"],
+                "template_version": row.get("template_version"),
+                "smtp_response": row.get("smtp_response"),
+            }
+            for row in rows
+            if row["user_did"] in ids
+        ]
+        if not params:
+            return []
+        # RETURNING hands back the new ids without a follow-up SELECT.
+        attempt_ids = conn.execute(
+            _INSERT_SEND_ATTEMPT.returning(
+                send_attempts.c.attempt_id, sort_by_parameter_order=True
+            ),
+            params,
+        ).scalars()
+        return [
+            SendAttemptRecord(
+                attempt_id=attempt_id,
+                participant_id=param["participant_id"],
+                status=param["status"],
+            )
+            for attempt_id, param in zip(attempt_ids, params)
+        ]
 
 
 def update_send_attempt(
@@ -494,14 +876,17 @@ def update_send_attempt(
 ) -> None:
     """Update the status/response of an existing send attempt."""
 
-    apply_migrations(db_path)
+    ensure_migrated(db_path)
     engine = get_mail_db_engine(db_path)
 
     with engine.begin() as conn:
         result = conn.execute(
-            update(send_attempts)
-            .where(send_attempts.c.attempt_id == attempt_id)
-            .values(status=status, smtp_response=smtp_response)
+            _UPDATE_SEND_ATTEMPT,
+            {
+                "b_attempt_id": attempt_id,
+                "b_status": status,
+                "b_response": smtp_response,
+            },
         )
         if result.rowcount == 0:
             raise SendAttemptNotFoundError(
@@ -509,6 +894,31 @@ def update_send_attempt(
             )
 
 
+_RECENT_SEND_ATTEMPTS = (
+    select(
+        send_attempts.c.attempt_id,
+        participants.c.user_did,
+        send_attempts.c.message_type,
+        send_attempts.c.mode,
+        send_attempts.c.status,
+        send_attempts.c.smtp_response,
+        send_attempts.c.template_version,
+        send_attempts.c.created_at,
+    )
+    .join(
+        participants,
+        send_attempts.c.participant_id == participants.c.participant_id,
+    )
+    .order_by(send_attempts.c.created_at.desc(), send_attempts.c.attempt_id.desc())
+)
+_LATEST_ATTEMPT_ID = (
+    select(send_attempts.c.attempt_id)
+    .where(send_attempts.c.participant_id == bindparam("b_participant_id"))
+    .order_by(send_attempts.c.created_at.desc(), send_attempts.c.attempt_id.desc())
+    .limit(1)
+)
+
+
 def fetch_recent_send_attempts(
     db_path: Path,
     *,
@@ -518,37 +928,40 @@ def fetch_recent_send_attempts(
 ) -> List[dict[str, Any]]:
     """Return recent send attempts ordered by newest first."""
 
-    apply_migrations(db_path)
-    engine = get_mail_db_engine(db_path)
-
-    stmt = (
-        select(
-            send_attempts.c.attempt_id,
-            participants.c.user_did,
-            send_attempts.c.message_type,
-            send_attempts.c.mode,
-            send_attempts.c.status,
-            send_attempts.c.smtp_response,
-            send_attempts.c.template_version,
-            send_attempts.c.created_at,
-        )
-        .join(
-            participants,
-            send_attempts.c.participant_id == participants.c.participant_id,
+    return list(
+        iter_recent_send_attempts(
+            db_path, limit=limit, user_did=user_did, message_type=message_type
         )
-        .order_by(send_attempts.c.created_at.desc(), send_attempts.c.attempt_id.desc())
-        .limit(limit)
     )
 
+
+def iter_recent_send_attempts(
+    db_path: Path,
+    *,
+    limit: int = 20,
+    user_did: Optional[str] = None,
+    message_type: Optional[str] = None,
+) -> Iterator[dict[str, Any]]:
+    """Yield recent send attempts newest first, fetching them in small batches."""
+
+    ensure_migrated(db_path)
+    engine = get_mail_db_engine(db_path)
+
+    # LIMIT is rendered as a bound parameter, so each filter combination
+    # compiles once and is then served from SQLAlchemy's statement cache.
+    stmt = _RECENT_SEND_ATTEMPTS.limit(limit)
     if user_did:
         stmt = stmt.where(participants.c.user_did == user_did)
     if message_type:
         stmt = stmt.where(send_attempts.c.message_type == message_type)
 
     with engine.connect() as conn:
-        rows = conn.execute(stmt).mappings().all()
-
-    return [dict(row) for row in rows]
+        result = conn.execution_options(
+            yield_per=SEND_ATTEMPT_FETCH_SIZE
+        ).execute(stmt)
+        for partition in result.mappings().partitions():
+            for row in partition:
+                yield dict(row)
 
 
 def mark_send_attempt_bounced(
@@ -560,50 +973,40 @@ def mark_send_attempt_bounced(
 ) -> None:
     """Mark the latest send attempt as bounced and set participant inactive."""
 
-    apply_migrations(db_path)
+    ensure_migrated(db_path)
     engine = get_mail_db_engine(db_path)
 
-    latest_attempt_id: Optional[int] = None
-
     with engine.begin() as conn:
-        participant_row = conn.execute(
-            select(participants.c.participant_id, participants.c.status).where(
-                participants.c.user_did == user_did
-            )
-        ).first()
-        if participant_row is None:
+        participant_id = conn.execute(
+            _PARTICIPANT_ID_BY_DID, {"b_user_did": user_did}
+        ).scalar()
+        if participant_id is None:
             raise ParticipantNotFoundError(
                 f"Participant with DID {user_did!r} not found in mail.db"
             )
 
-        attempt_row = conn.execute(
-            select(send_attempts.c.attempt_id)
-            .where(send_attempts.c.participant_id == participant_row.participant_id)
-            .order_by(
-                send_attempts.c.created_at.desc(), send_attempts.c.attempt_id.desc()
-            )
-            .limit(1)
-        ).first()
+        latest_attempt_id = conn.execute(
+            _LATEST_ATTEMPT_ID, {"b_participant_id": participant_id}
+        ).scalar()
 
-        if attempt_row is not None:
+        if latest_attempt_id is not None:
             conn.execute(
-                update(send_attempts)
-                .where(send_attempts.c.attempt_id == attempt_row.attempt_id)
-                .values(
-                    status="failed",
-                    smtp_response=reason or "bounced",
-                )
+                _UPDATE_SEND_ATTEMPT,
+                {
+                    "b_attempt_id": latest_attempt_id,
+                    "b_status": "failed",
+                    "b_response": reason or "bounced",
+                },
             )
-            latest_attempt_id = attempt_row.attempt_id
 
-    # Ensure participant marked inactive (captures history)
-    set_participant_status(
-        db_path,
-        user_did=user_did,
-        new_status="inactive",
-        reason=reason or "hard bounce",
-        changed_by=changed_by or "bounce-handler",
-    )
+        # Same transaction, so the attempt and the status change commit together.
+        _set_status_in_conn(
+            conn,
+            user_did=user_did,
+            new_status="inactive",
+            reason=(reason or "hard bounce").strip(),
+            changed_by=(changed_by or "bounce-handler").strip(),
+        )
 
     if latest_attempt_id is None:
         raise SendAttemptNotFoundError(
@@ -611,6 +1014,155 @@ def mark_send_attempt_bounced(
         )
 
 
+def mark_send_attempts_bounced(
+    db_path: Path,
+    updates: Iterable[Tuple[str, Optional[str]]],
+    *,
+    changed_by: Optional[str] = None,
+    conn: Optional[Connection] = None,
+) -> List[str]:
+    """Bulk variant of :func:`mark_send_attempt_bounced` using one transaction.
+
+    ``updates`` holds ``(user_did, reason)`` pairs. Unknown DIDs are skipped and
+    participants without send attempts are still set inactive. Returns the DIDs
+    that were found. When ``conn`` is given the caller owns the commit.
+    """
+
+    reasons: Dict[str, Optional[str]] = {}
+    for user_did, reason in updates:
+        reasons.setdefault(user_did, reason)
+    if not reasons:
+        return []
+
+    actor = changed_by or "bounce-handler"
+    if conn is not None:
+        return _mark_bounced_in_conn(conn, reasons, actor)
+
+    ensure_migrated(db_path)
+    engine = get_mail_db_engine(db_path)
+    with engine.begin() as conn:
+        return _mark_bounced_in_conn(conn, reasons, actor)
+
+
+def _mark_bounced_in_conn(
+    conn: Connection, reasons: Dict[str, Optional[str]], actor: str
+) -> List[str]:
+    participant_ids: Dict[str, int] = {}
+    for chunk in _chunked(list(reasons)):
+        rows = conn.execute(
+            select(participants.c.participant_id, participants.c.user_did).where(
+                participants.c.user_did.in_(chunk)
+            )
+        )
+        participant_ids.update({row.user_did: row.participant_id for row in rows})
+    if not participant_ids:
+        return []
+
+    did_by_id = {pid: did for did, pid in participant_ids.items()}
+    attempt_updates: List[dict[str, Any]] = []
+    for chunk in _chunked(list(did_by_id)):
+        ranked = (
+            select(
+                send_attempts.c.participant_id,
+                send_attempts.c.attempt_id,
+                func.row_number()
+                .over(
+                    partition_by=send_attempts.c.participant_id,
+                    order_by=(
+                        send_attempts.c.created_at.desc(),
+                        send_attempts.c.attempt_id.desc(),
+                    ),
+                )
+                .label("rank"),
+            )
+            .where(send_attempts.c.participant_id.in_(chunk))
+            .subquery()
+        )
+        latest = conn.execute(
+            select(ranked.c.participant_id, ranked.c.attempt_id).where(
+                ranked.c.rank == 1
+            )
+        )
+        for row in latest:
+            reason = reasons[did_by_id[row.participant_id]]
+            attempt_updates.append(
+                {"b_attempt_id": row.attempt_id, "b_response": reason or "bounced"}
+            )
+
+    if attempt_updates:
+        conn.execute(
+            update(send_attempts)
+            .where(send_attempts.c.attempt_id == bindparam("b_attempt_id"))
+            .values(status="failed", smtp_response=bindparam("b_response")),
+            attempt_updates,
+        )
+
+    for user_did in participant_ids:
+        _set_status_in_conn(
+            conn,
+            user_did=user_did,
+            new_status="inactive",
+            reason=(reasons[user_did] or "hard bounce").strip(),
+            changed_by=actor.strip(),
+        )
+
+    return list(participant_ids)
+
+
+def _set_status_in_conn(
+    conn: Connection,
+    *,
+    user_did: str,
+    new_status: str,
+    reason: Optional[str],
+    changed_by: Optional[str],
+) -> StatusChangeResult:
+    """Apply a validated status change inside an open transaction."""
+    row: Optional[Row] = conn.execute(
+        _PARTICIPANT_STATUS_BY_DID, {"b_user_did": user_did}
+    ).first()
+    if row is None:
+        raise ParticipantNotFoundError(
+            f"Participant with DID {user_did!r} not found in mail.db"
+        )
+
+    old_status: str = row.status
+    participant_id = row.participant_id
+
+    if old_status == new_status:
+        return StatusChangeResult(
+            user_did=user_did,
+            old_status=old_status,
+            new_status=new_status,
+            reason=None,
+            changed_by=None,
+            changed=False,
+        )
+
+    conn.execute(
+        update(participants)
+        .where(participants.c.participant_id == participant_id)
+        .values(status=new_status, updated_at=func.now())
+    )
+    conn.execute(
+        participant_status_history.insert().values(
+            participant_id=participant_id,
+            old_status=old_status,
+            new_status=new_status,
+            reason=reason,
+            changed_by=changed_by,
+        )
+    )
+    return StatusChangeResult(
+        user_did=user_did,
+        old_status=old_status,
+        new_status=new_status,
+        reason=reason,
+        changed_by=changed_by,
+        changed=True,
+    )
+
+
 def set_participant_status(
     db_path: Path,
     *,
@@ -632,7 +1184,7 @@ def set_participant_status(
         )
 
     # Ensure schema exists; idempotent if already current.
-    apply_migrations(db_path)
+    ensure_migrated(db_path)
 
     engine = get_mail_db_engine(db_path)
     reason_text = reason.strip() if reason else None
@@ -640,57 +1192,16 @@ def set_participant_status(
 
     try:
         with engine.begin() as conn:
-            row: Optional[Row] = conn.execute(
-                select(
-                    participants.c.participant_id,
-                    participants.c.status,
-                    participants.c.user_did,
-                ).where(participants.c.user_did == user_did)
-            ).first()
-            if row is None:
-                raise ParticipantNotFoundError(
-                    f"Participant with DID {user_did!r} not found in mail.db"
-                )
-
-            old_status: str = row.status
-            participant_id = row.participant_id
-
-            if old_status == normalized_status:
-                return StatusChangeResult(
-                    user_did=user_did,
-                    old_status=old_status,
-                    new_status=normalized_status,
-                    reason=None,
-                    changed_by=None,
-                    changed=False,
-                )
-
-            conn.execute(
-                update(participants)
-                .where(participants.c.participant_id == participant_id)
-                .values(status=normalized_status, updated_at=func.now())
-            )
-            conn.execute(
-                participant_status_history.insert().values(
-                    participant_id=participant_id,
-                    old_status=old_status,
-                    new_status=normalized_status,
-                    reason=reason_text,
-                    changed_by=changed_by_text,
-                )
+            return _set_status_in_conn(
+                conn,
+                user_did=user_did,
+                new_status=normalized_status,
+                reason=reason_text,
+                changed_by=changed_by_text,
             )
     except SQLAlchemyError as exc:  # pragma: no cover - defensive logging hook
         raise RuntimeError("Failed to update participant status") from exc
 
-    return StatusChangeResult(
-        user_did=user_did,
-        old_status=old_status,
-        new_status=normalized_status,
-        reason=reason_text,
-        changed_by=changed_by_text,
-        changed=True,
-    )
-
 
 __all__ = [
     "ALLOWED_STATUSES",
@@ -703,14 +1214,25 @@ __all__ = [
     "StatusChangeResult",
     "RosterUpsertResult",
     "SendAttemptRecord",
+    "ComplianceMonitoringRow",
     "get_mail_db_engine",
+    "mail_db_connection",
+    "iter_participants",
     "list_participants",
+    "list_participant_dids",
     "find_participant_by_email",
+    "find_participants_by_emails",
+    "find_participant_ids",
+    "participant_exists",
     "export_participants_to_csv",
     "set_participant_status",
     "upsert_participants",
     "record_send_attempt",
+    "record_send_attempt_by_id",
+    "record_send_attempts_bulk",
     "update_send_attempt",
     "fetch_recent_send_attempts",
+    "iter_recent_send_attempts",
     "mark_send_attempt_bounced",
+    "mark_send_attempts_bounced",
 ]
@@ -19,7 +19,7 @@ from sqlalchemy.sql import func, text
 
 metadata = MetaData()
 
-SCHEMA_VERSION = 5
+SCHEMA_VERSION = 7
 
 participants = Table(
     "participants",
@@ -44,6 +44,10 @@ participants = Table(
     ),
 )
 Index("idx_participants_status", participants.c.status)
+# Email lookups are case-insensitive; index the exact expression they filter on.
+participants_email_lower_index = Index(
+    "idx_participants_email_lower", func.lower(participants.c.email)
+)
 
 participant_status_history = Table(
     "participant_status_history",
@@ -105,6 +109,26 @@ send_attempts = Table(
     Column("created_at", DateTime, nullable=False, server_default=func.now()),
 )
 Index("idx_send_attempts_status", send_attempts.c.status)
+# Newest-first attempt lookups: overall, per participant and per message type.
+send_attempts_recent_indexes = (
+    Index(
+        "idx_send_attempts_created",
+        send_attempts.c.created_at.desc(),
+        send_attempts.c.attempt_id.desc(),
+    ),
+    Index(
+        "idx_send_attempts_participant_created",
+        send_attempts.c.participant_id,
+        send_attempts.c.created_at.desc(),
+        send_attempts.c.attempt_id.desc(),
+    ),
+    Index(
+        "idx_send_attempts_type_created",
+        send_attempts.c.message_type,
+        send_attempts.c.created_at.desc(),
+        send_attempts.c.attempt_id.desc(),
+    ),
+)
 
 compliance_monitoring = Table(
     "compliance_monitoring",
@@ -4,23 +4,60 @@ from __future__ import annotations
 
 import json
 import smtplib
+import threading
 from datetime import datetime, timezone
 from email.message import EmailMessage
-from typing import Optional
+from typing import Optional, TextIO
 
 from .config import Settings
 from .email_renderer import RenderedEmail
 from .mail_db.operations import (
     ParticipantNotFoundError,
     record_send_attempt,
+    record_send_attempt_by_id,
     update_send_attempt,
 )
 
 
 class MailSender:
+    """Send rendered emails, recording each attempt in mail.db.
+
+    Used as a context manager, one SMTP session per calling thread and the
+    send log are kept open and reused until the block exits; otherwise each
+    send connects and opens the log on its own. ``send`` may be called from
+    several threads.
+    """
+
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
         self.settings.ensure_outbox()
+        self._keep_open = False
+        self._local = threading.local()
+        self._sessions: list[smtplib.SMTP] = []
+        self._log_handle: Optional[TextIO] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "MailSender":
+        self._keep_open = True
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close every reused SMTP session and the send log."""
+        self._keep_open = False
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+            self._local = threading.local()
+            log_handle, self._log_handle = self._log_handle, None
+        if log_handle is not None:
+            log_handle.close()
+        for smtp in sessions:
+            try:
+                smtp.quit()
+            except smtplib.SMTPException:
+                smtp.close()
 
     def send(
         self,
@@ -31,7 +68,13 @@ class MailSender:
         dry_run_override: Optional[bool] = None,
         message_type: str = "generic",
         template_version: Optional[str] = None,
+        participant_id: Optional[int] = None,
     ) -> None:
+        """Send ``rendered`` to ``recipient`` and record the attempt.
+
+        Pass ``participant_id`` when the caller has already resolved
+        ``user_did`` so recording the attempt skips the roster lookup.
+        """
         dry_run = (
             self.settings.smtp_dry_run if dry_run_override is None else dry_run_override
         )
@@ -39,14 +82,24 @@ class MailSender:
         message = self._build_message(rendered, recipient)
         attempt_id: Optional[int] = None
         try:
-            attempt = record_send_attempt(
-                self.settings.mail_db_path,
-                user_did=user_did,
-                message_type=message_type,
-                mode=mode,
-                status="queued",
-                template_version=template_version,
-            )
+            if participant_id is not None:
+                attempt = record_send_attempt_by_id(
+                    self.settings.mail_db_path,
+                    participant_id=participant_id,
+                    message_type=message_type,
+                    mode=mode,
+                    status="queued",
+                    template_version=template_version,
+                )
+            else:
+                attempt = record_send_attempt(
+                    self.settings.mail_db_path,
+                    user_did=user_did,
+                    message_type=message_type,
+                    mode=mode,
+                    status="queued",
+                    template_version=template_version,
+                )
             attempt_id = attempt.attempt_id
         except ParticipantNotFoundError:
             attempt_id = None
@@ -111,19 +164,45 @@ class MailSender:
         return str(path)
 
     def _deliver(self, message: EmailMessage) -> Optional[dict[str, tuple[int, bytes]]]:
-        if self.settings.smtp_use_ssl:
-            with smtplib.SMTP_SSL(
-                self.settings.smtp_host, self.settings.smtp_port
-            ) as smtp:
-                self._authenticate_if_needed(smtp)
+        if not self._keep_open:
+            with self._connect() as smtp:
                 return smtp.send_message(message)
+
+        session: Optional[smtplib.SMTP] = getattr(self._local, "smtp", None)
+        if session is None:
+            session = self._open_session()
+        try:
+            return session.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped the idle session; reconnect once and retry.
+            session.close()
+            return self._open_session(replacing=session).send_message(message)
+
+    def _open_session(self, replacing: Optional[smtplib.SMTP] = None) -> smtplib.SMTP:
+        smtp = self._connect()
+        with self._lock:
+            if replacing is not None and replacing in self._sessions:
+                self._sessions.remove(replacing)
+            self._sessions.append(smtp)
+        self._local.smtp = smtp
+        return smtp
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp: smtplib.SMTP
+        if self.settings.smtp_use_ssl:
+            smtp = smtplib.SMTP_SSL(self.settings.smtp_host, self.settings.smtp_port)
         else:
-            with smtplib.SMTP(self.settings.smtp_host, self.settings.smtp_port) as smtp:
+            smtp = smtplib.SMTP(self.settings.smtp_host, self.settings.smtp_port)
+        try:
+            if not self.settings.smtp_use_ssl:
                 smtp.ehlo()
                 smtp.starttls()
                 smtp.ehlo()
-                self._authenticate_if_needed(smtp)
-                return smtp.send_message(message)
+            self._authenticate_if_needed(smtp)
+        except Exception:
+            smtp.close()
+            raise
+        return smtp
 
     def _authenticate_if_needed(self, smtp: smtplib.SMTP) -> None:
         if self.settings.smtp_username and self.settings.smtp_password:
@@ -140,5 +219,18 @@ class MailSender:
             "status": status,
             "dry_run": status == "dry-run",
         }
-        with self.settings.send_log_path.open("a", encoding="utf-8") as handle:
-            handle.write(json.dumps(record) + "\n")
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            # Inside a ``with`` block the log stays open for the whole run;
+            # each line is still flushed so a crash loses nothing written.
+            handle = self._log_handle
+            if handle is None:
+                handle = self.settings.send_log_path.open("a", encoding="utf-8")
+            try:
+                handle.write(line)
+                handle.flush()
+            finally:
+                if self._keep_open:
+                    self._log_handle = handle
+                else:
+                    handle.close()
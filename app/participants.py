@@ -6,8 +6,6 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable, List, Optional
 
-from .mail_db.operations import list_participants
-
 
 @dataclass
 class Participant:
@@ -50,6 +48,8 @@ def load_participants(
 ) -> List[Participant]:
     """Load participants roster, preferring mail.db when available."""
     if mail_db_path and mail_db_path.exists():
+        from .mail_db.operations import list_participants
+
         db_participants = list_participants(mail_db_path)
         if db_participants:
             roster: List[Participant] = []
@@ -89,3 +89,10 @@ def load_participants(
 def filter_active(participants: Iterable[Participant]) -> List[Participant]:
     """Return participants flagged for inclusion in emails."""
     return [p for p in participants if p.include_in_emails]
+
+
+def load_active_participants(
+    csv_path: Path, *, mail_db_path: Optional[Path] = None
+) -> List[Participant]:
+    """Load the roster and keep only participants flagged for inclusion in emails."""
+    return filter_active(load_participants(csv_path, mail_db_path=mail_db_path))
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+from email import message_from_bytes
 from email.message import EmailMessage
 from pathlib import Path
+import re
 import sys
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -10,7 +12,11 @@ if str(ROOT) not in sys.path:
 
 import pytest  # noqa: E402
 
-from app.bounce_scanner import BounceScannerError, scan_bounces  # noqa: E402
+from app.bounce_scanner import (  # noqa: E402
+    BounceScannerError,
+    _extract_recipients,
+    scan_bounces,
+)
 from app.config import Settings  # noqa: E402
 from app.mail_db.migrations import apply_migrations  # noqa: E402
 from app.mail_db.operations import (  # noqa: E402
@@ -20,6 +26,40 @@ from app.mail_db.operations import (  # noqa: E402
 from app.mail_db.schema import participants, send_attempts  # noqa: E402
 
 
+def _bodystructure(part) -> bytes:
+    """Render a minimal RFC 3501 BODYSTRUCTURE for an email.message part."""
+    maintype = part.get_content_maintype().upper().encode()
+    subtype = part.get_content_subtype().upper().encode()
+    if part.get_content_type() == "message/rfc822":
+        nested = _bodystructure(part.get_payload(0))
+        return b'("MESSAGE" "RFC822" NIL NIL NIL "7BIT" 0 NIL %s 0)' % nested
+    if part.is_multipart() and part.get_content_maintype() == "multipart":
+        children = b"".join(_bodystructure(child) for child in part.get_payload())
+        return b'(%s "%s")' % (children, subtype)
+    encoding = (part.get("Content-Transfer-Encoding") or "7bit").upper().encode()
+    return b'("%s" "%s" NIL NIL NIL "%s" 0)' % (maintype, subtype, encoding)
+
+
+def _section_bytes(message, payload: bytes, section: str) -> bytes:
+    if section.startswith("HEADER.FIELDS"):
+        wanted = re.search(r"\((.*)\)", section).group(1).lower().split()
+        lines = [
+            line
+            for line in payload.split(b"\n\n", 1)[0].split(b"\n")
+            if line.split(b":", 1)[0].decode().lower() in wanted
+        ]
+        return b"\n".join(lines) + b"\n\n"
+    part = message
+    for index in section.split("."):
+        if part.get_content_type() == "message/rfc822":
+            part = part.get_payload(0)
+        if part.get_content_maintype() == "multipart":
+            part = part.get_payload(int(index) - 1)
+    if part.get_content_type() == "message/delivery-status":
+        return part.as_bytes().split(b"\n\n", 1)[1]
+    return part.get_payload(decode=False).encode()
+
+
 class FakeIMAP:
     def __init__(self, host, port, *, messages=None):
         self.host = host
@@ -28,6 +68,9 @@ class FakeIMAP:
         self.logged_in = False
         self.selected = None
         self.flags = {}
+        self.fetch_calls = []
+        self.store_calls = []
+        self.search_criteria = None
 
     def login(self, username, password):
         if not username or not password:
@@ -38,18 +81,53 @@ class FakeIMAP:
         self.selected = mailbox
         return "OK", []
 
-    def search(self, charset, criteria):
-        ids = b" ".join(sorted(self.messages.keys()))
-        return "OK", [ids]
+    def uid(self, command, *args):
+        handler = getattr(self, f"_uid_{command.lower()}")
+        return handler(*args)
 
-    def fetch(self, msg_id, spec):
-        payload = self.messages.get(msg_id)
-        if payload is None:
-            return "NO", []
-        return "OK", [(msg_id, payload)]
+    def _uid_search(self, charset, *criteria):
+        self.search_criteria = criteria
+        uids = b" ".join(sorted(self.messages.keys(), key=int))
+        return "OK", [uids]
 
-    def store(self, msg_id, op, flags):
-        self.flags[msg_id] = flags
+    def _uid_fetch(self, uid_set, spec):
+        self.fetch_calls.append((uid_set, spec))
+        ordered = sorted(self.messages, key=int)
+        sequence = {uid: index for index, uid in enumerate(ordered, start=1)}
+        data = []
+        for uid in uid_set.split(b","):
+            payload = self.messages.get(uid)
+            if payload is None:
+                continue
+            seq = b"%d" % sequence[uid]
+            message = message_from_bytes(payload)
+            if "BODYSTRUCTURE" in spec:
+                structure = _bodystructure(message)
+                data.append(
+                    seq + b" (UID " + uid + b" BODYSTRUCTURE " + structure + b")"
+                )
+                continue
+            # Report the UID after the literals, as some servers do.
+            prefix = seq + b" ("
+            for section, origin, length in re.findall(
+                r"BODY\.PEEK\[([^\]]*)\](?:<(\d+)\.(\d+)>)?", spec
+            ):
+                content = _section_bytes(message, payload, section)
+                name = b"BODY[%s]" % section.upper().encode()
+                if length:
+                    content = content[int(origin) : int(origin) + int(length)]
+                    name += b"<%s>" % origin.encode()
+                header = prefix + b"%s {%d}" % (name, len(content))
+                data.append((header, content))
+                prefix = b" "
+            data.append(b" UID " + uid + b")")
+        return "OK", data
+
+    def _uid_store(self, uid_set, op, flags):
+        assert op == "+FLAGS.SILENT"
+        self.store_calls.append(uid_set)
+        for uid in uid_set.split(b","):
+            self.flags[uid] = flags
         return "OK", []
 
     def close(self):
@@ -137,6 +215,40 @@ def test_scan_bounces_marks_participant(settings_with_imap, monkeypatch):
     assert participant_status == "inactive"
 
 
+def test_extract_recipients_reads_final_recipient_lines():
+    body = (
+        b"Reporting-MTA: dns; mx.example.com\r\n"
+        b"X-Note: see Final-Recipient: rfc822; quoted@example.com\r\n"
+        b"FINAL-RECIPIENT:\tRFC822;  First@Example.com\r\n"
+        b"Final-Recipient: rfc822;second@example.com\n"
+        b"Final-Recipient: x400; ignored\n"
+    )
+    assert _extract_recipients(b"", body) == {
+        "first@example.com",
+        "second@example.com",
+    }
+
+
+def test_scan_bounces_caps_part_size(settings_with_imap, monkeypatch):
+    settings = settings_with_imap
+    msg = EmailMessage()
+    msg.set_content(
+        "Final-Recipient: rfc822; capped@example.com\n" + "padding line\n" * 2000
+    )
+    fake_imap = FakeIMAP(
+        settings.imap_host, settings.imap_port, messages={b"1": msg.as_bytes()}
+    )
+    monkeypatch.setattr(
+        "app.bounce_scanner.imaplib.IMAP4_SSL", lambda host, port: fake_imap
+    )
+
+    outcome = scan_bounces(settings)
+
+    assert outcome.unmatched_recipients == ["capped@example.com"]
+    _, spec = fake_imap.fetch_calls[-1]
+    assert spec.endswith("BODY.PEEK[1]<0.8192>)")
+
+
 def test_scan_bounces_requires_credentials(settings_with_imap):
     settings = settings_with_imap.with_overrides(imap_host=None)
     with pytest.raises(BounceScannerError):
@@ -157,3 +269,125 @@ def test_scan_bounces_unmatched(settings_with_imap, monkeypatch):
     )
     outcome = scan_bounces(settings)
     assert outcome.unmatched_recipients == ["unknown@example.com"]
+
+
+def test_scan_bounces_dedupes_recipients(settings_with_imap, monkeypatch):
+    settings = settings_with_imap
+    _seed_participant_and_attempt(
+        settings, email="bounce@example.com", user_did="did:bounce"
+    )
+    messages = {}
+    for uid, address in [(b"1", "bounce@example.com"), (b"2", "BOUNCE@example.com")]:
+        msg = EmailMessage()
+        msg.set_content(f"Final-Recipient: rfc822; {address}")
+        messages[uid] = msg.as_bytes()
+    fake_imap = FakeIMAP(settings.imap_host, settings.imap_port, messages=messages)
+    monkeypatch.setattr(
+        "app.bounce_scanner.imaplib.IMAP4_SSL", lambda host, port: fake_imap
+    )
+
+    outcome = scan_bounces(settings)
+
+    assert outcome.messages_seen == 2
+    assert outcome.participants_updated == ["did:bounce"]
+    assert outcome.unmatched_recipients == []
+
+
+def test_scan_bounces_batches_fetch_and_store(settings_with_imap, monkeypatch):
+    settings = settings_with_imap
+    messages = {}
+    for index, address in enumerate(["a@example.com", "b@example.com"], start=1):
+        msg = EmailMessage()
+        msg.set_content(f"Final-Recipient: rfc822; {address}")
+        messages[str(40 + index).encode()] = msg.as_bytes()
+    fake_imap = FakeIMAP(settings.imap_host, settings.imap_port, messages=messages)
+    monkeypatch.setattr(
+        "app.bounce_scanner.imaplib.IMAP4_SSL", lambda host, port: fake_imap
+    )
+
+    outcome = scan_bounces(settings)
+
+    assert outcome.messages_seen == 2
+    assert sorted(outcome.unmatched_recipients) == ["a@example.com", "b@example.com"]
+    assert [uid_set for uid_set, _ in fake_imap.fetch_calls] == [b"41,42", b"41,42"]
+    assert fake_imap.store_calls == [b"41,42"]
+    assert fake_imap.search_criteria == (
+        "UNSEEN",
+        "OR",
+        "FROM",
+        '"MAILER-DAEMON"',
+        "HEADER",
+        "Content-Type",
+        '"multipart/report"',
+    )
+
+
+def test_scan_bounces_processes_uid_chunks(settings_with_imap, monkeypatch):
+    settings = settings_with_imap.with_overrides(imap_batch_size=2)
+    messages = {}
+    for index in range(1, 4):
+        msg = EmailMessage()
+        msg.set_content(f"Final-Recipient: rfc822; user{index}@example.com")
+        messages[str(index).encode()] = msg.as_bytes()
+    fake_imap = FakeIMAP(settings.imap_host, settings.imap_port, messages=messages)
+    monkeypatch.setattr(
+        "app.bounce_scanner.imaplib.IMAP4_SSL", lambda host, port: fake_imap
+    )
+
+    outcome = scan_bounces(settings)
+
+    assert outcome.messages_seen == 3
+    assert len(outcome.unmatched_recipients) == 3
+    assert fake_imap.store_calls == [b"1,2", b"3"]
+
+
+def test_scan_bounces_skips_attachments(settings_with_imap, monkeypatch):
+    settings = settings_with_imap
+    raw = (
+        b"From: MAILER-DAEMON@mx.example.com\n"
+        b"Subject: Undelivered Mail Returned to Sender\n"
+        b"MIME-Version: 1.0\n"
+        b'Content-Type: multipart/report; report-type=delivery-status; boundary="b"\n'
+        b"\n"
+        b"--b\n"
+        b"Content-Type: text/plain\n"
+        b"\n"
+        b"Delivery to the following recipient failed.\n"
+        b"--b\n"
+        b"Content-Type: message/delivery-status\n"
+        b"\n"
+        b"Reporting-MTA: dns; mx.example.com\n"
+        b"\n"
+        b"Final-Recipient: rfc822; dsn@example.com\n"
+        b"Action: failed\n"
+        b"--b\n"
+        b"Content-Type: image/png\n"
+        b"Content-Transfer-Encoding: base64\n"
+        b"\n"
+        b"AAAAAAAAAAAAAAAA\n"
+        b"--b\n"
+        b"Content-Type: message/rfc822\n"
+        b"\n"
+        b"To: original@example.com\n"
+        b"Subject: Your daily update\n"
+        b"\n"
+        b"Original message body.\n"
+        b"--b--\n"
+    )
+    fake_imap = FakeIMAP(
+        settings.imap_host,
+        settings.imap_port,
+        messages={b"1": raw},
+    )
+    monkeypatch.setattr(
+        "app.bounce_scanner.imaplib.IMAP4_SSL", lambda host, port: fake_imap
+    )
+
+    outcome = scan_bounces(settings)
+
+    assert outcome.unmatched_recipients == ["dsn@example.com"]
+    _, spec = fake_imap.fetch_calls[-1]
+    assert spec == (
+        "(BODY.PEEK[HEADER.FIELDS (From Content-Type)]"
+        " BODY.PEEK[1]<0.8192> BODY.PEEK[2]<0.8192>)"
+    )
@@ -66,8 +66,10 @@ def test_cache_daily_snapshots_writes_rows(tmp_path, monkeypatch) -> None:
     ]
 
     monkeypatch.setattr(
-        "app.cli.get_daily_engagement_breakdown",
-        lambda *args, **kwargs: snapshots,
+        "app.compliance_snapshot.get_daily_engagement_breakdown_bulk",
+        lambda engine, user_dids, *args, **kwargs: {
+            did: snapshots for did in user_dids
+        },
     )
 
     runner = CliRunner()
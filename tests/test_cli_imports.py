@@ -0,0 +1,51 @@
+from pathlib import Path
+import subprocess
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+
+LAZY_MODULES = (
+    "app.bounce_scanner",
+    "app.compliance_snapshot",
+    "app.email_renderer",
+    "app.mailer",
+    "app.mail_db.operations",
+    "app.qualtrics_sync",
+    "dotenv",
+    "jinja2",
+    "sqlalchemy",
+    "yaml",
+)
+
+
+def _loaded_lazy_modules(*statements: str) -> str:
+    script = "\n".join(
+        [
+            "import sys",
+            *statements,
+            f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))",
+        ]
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ""
+
+
+def test_cli_import_defers_feature_modules():
+    assert _loaded_lazy_modules("import app.cli") == ""
+
+
+def test_cli_help_defers_feature_modules():
+    loaded = _loaded_lazy_modules(
+        "from click.testing import CliRunner",
+        "from app.cli import cli",
+        "result = CliRunner().invoke(cli, ['--help'])",
+        "assert result.exit_code == 0, result.output",
+        "assert 'send-daily' in result.output and 'bounces-scan' in result.output",
+    )
+    assert loaded == ""
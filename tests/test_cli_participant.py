@@ -433,3 +433,47 @@ def test_cli_participant_seed_completion(tmp_path, monkeypatch) -> None:
     )
     assert repeat.exit_code == 0
     assert "No participants required seeding" in repeat.output
+
+
+def test_participant_seed_completion_rejects_non_iso_timestamp():
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        ["participant", "seed-completion", "--timestamp", "October 1st"],
+    )
+
+    assert result.exit_code != 0
+    assert "Invalid timestamp 'October 1st'" in result.output
+
+
+def test_cli_participant_add_normalizes_status_case(tmp_path, monkeypatch) -> None:
+    db_path = tmp_path / "mail.sqlite"
+    apply_migrations(db_path)
+    csv_path = tmp_path / "participants.csv"
+    csv_path.write_text(
+        "email,did,status,type,feed_url,survey_completed_at,prolific_id,study_type,audit_timestamp\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(
+        "app.cli._load_settings",
+        lambda: Settings().with_overrides(
+            mail_db_path=db_path,
+            participants_csv_path=csv_path,
+        ),
+    )
+
+    runner = CliRunner()
+    base_args = ["participant", "add", "--email", "case@example.com", "--did"]
+    result = runner.invoke(cli, [*base_args, "did:case", "--status", "Inactive"])
+    assert result.exit_code == 0, result.output
+
+    rejected = runner.invoke(cli, [*base_args, "did:bad", "--status", "paused"])
+    assert rejected.exit_code != 0
+    assert "'paused' is not one of" in rejected.output
+
+    engine = get_mail_db_engine(db_path)
+    with engine.connect() as conn:
+        status = conn.execute(
+            select(participants.c.status).where(participants.c.user_did == "did:case")
+        ).scalar_one()
+    assert status == "inactive"
@@ -0,0 +1,85 @@
+from pathlib import Path
+import sqlite3
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from click.testing import CliRunner  # noqa: E402
+
+from app.cli import cli  # noqa: E402
+from app.config import Settings  # noqa: E402
+from app.mail_db.migrations import apply_migrations  # noqa: E402
+from app.mail_db.operations import get_mail_db_engine  # noqa: E402
+from app.mail_db.schema import participants  # noqa: E402
+
+
+def _create_compliance_db(path: Path) -> None:
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript("""
+            CREATE TABLE feed_requests (requester_did TEXT, timestamp TEXT);
+            CREATE TABLE engagements (
+                did_engagement TEXT, engagement_type TEXT, timestamp TEXT
+            );
+            INSERT INTO feed_requests VALUES ('did:feed', '2025-01-01T09:00:00Z');
+            INSERT INTO engagements VALUES
+                ('did:engaged', 'like', '2025-01-01T09:00:00Z');
+            """)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _seed_participants(db_path: Path, dids: list[str]) -> None:
+    engine = get_mail_db_engine(db_path)
+    with engine.begin() as conn:
+        for did in dids:
+            name = did.split(":")[-1]
+            conn.execute(
+                participants.insert().values(
+                    user_did=did,
+                    email=f"{name}@example.com",
+                    status="active",
+                    type="pilot",
+                    language="en",
+                    feed_url=f"https://feeds.example.com/{name}",
+                )
+            )
+
+
+def _settings(tmp_path: Path) -> Settings:
+    return Settings().with_overrides(
+        compliance_db_path=tmp_path / "compliance.db",
+        mail_db_path=tmp_path / "mail.sqlite",
+        participants_csv_path=tmp_path / "participants.csv",
+    )
+
+
+def test_validate_participants_reports_missing_activity(tmp_path, monkeypatch) -> None:
+    settings = _settings(tmp_path)
+    _create_compliance_db(settings.compliance_db_path)
+    apply_migrations(settings.mail_db_path)
+    _seed_participants(settings.mail_db_path, ["did:feed", "did:engaged", "did:silent"])
+    monkeypatch.setattr("app.cli._load_settings", lambda: settings)
+
+    result = CliRunner().invoke(cli, ["validate-participants"])
+
+    assert result.exit_code != 0
+    assert "Participants without compliance activity: 1" in result.output
+    assert "did:silent" in result.output
+    assert "did:feed" not in result.output.split("activity: 1", 1)[1]
+
+
+def test_validate_participants_succeeds_when_all_active(tmp_path, monkeypatch) -> None:
+    settings = _settings(tmp_path)
+    _create_compliance_db(settings.compliance_db_path)
+    apply_migrations(settings.mail_db_path)
+    _seed_participants(settings.mail_db_path, ["did:feed", "did:engaged"])
+    monkeypatch.setattr("app.cli._load_settings", lambda: settings)
+
+    result = CliRunner().invoke(cli, ["validate-participants"])
+
+    assert result.exit_code == 0, result.output
+    assert "Roster validation successful" in result.output
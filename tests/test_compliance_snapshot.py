@@ -13,8 +13,11 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from app.compliance_snapshot import (  # noqa: E402
+    compute_window_summaries_bulk,
     compute_window_summary,
     get_daily_engagement_breakdown,
+    get_daily_engagement_breakdown_bulk,
+    participants_with_activity,
 )
 from app.config import Settings  # noqa: E402
 
@@ -167,6 +170,65 @@ def test_compute_window_summary_returns_none_when_no_activity() -> None:
     assert summary is None
 
 
+def test_compute_window_summaries_bulk_matches_single() -> None:
+    engine = _make_engine()
+    # A late joiner gets a shorter window than the long-running participant.
+    for offset in range(4):
+        _insert_activity(
+            engine, did="did:early", day_offset=offset, retrievals=1, engagements=3
+        )
+    _insert_activity(engine, did="did:late", day_offset=2, retrievals=2, engagements=1)
+
+    settings = Settings().with_overrides(
+        tz="UTC",
+        window_days=3,
+        required_active_days=2,
+        cutoff_hour_local=0,
+    )
+    now = datetime(2025, 1, 4, 18, 0, tzinfo=timezone.utc)
+
+    summaries = compute_window_summaries_bulk(
+        engine, ["did:early", "did:late", "did:none"], settings, now=now
+    )
+
+    assert set(summaries) == {"did:early", "did:late"}
+    for did, summary in summaries.items():
+        assert summary == compute_window_summary(engine, did, settings, now=now)
+    assert len(summaries["did:early"].snapshots) == 3
+    assert summaries["did:early"].active_days == 3
+    assert [s.retrievals for s in summaries["did:late"].snapshots] == [2, 0]
+
+
+def test_compute_window_summaries_bulk_without_detail_matches_tally() -> None:
+    engine = _make_engine()
+    for offset in (0, 2):
+        _insert_activity(
+            engine, did="did:mixed", day_offset=offset, retrievals=1, engagements=3
+        )
+    _insert_activity(engine, did="did:mixed", day_offset=3, retrievals=1, engagements=2)
+    _insert_activity(engine, did="did:idle", day_offset=1, retrievals=1, engagements=0)
+
+    settings = Settings().with_overrides(
+        tz="UTC",
+        window_days=4,
+        required_active_days=3,
+        cutoff_hour_local=0,
+    )
+    now = datetime(2025, 1, 4, 18, 0, tzinfo=timezone.utc)
+    dids = ["did:mixed", "did:idle"]
+
+    detailed = compute_window_summaries_bulk(engine, dids, settings, now=now)
+    tallied = compute_window_summaries_bulk(
+        engine, dids, settings, now=now, detail=False
+    )
+
+    assert set(tallied) == set(detailed)
+    for did, summary in tallied.items():
+        assert summary.snapshots == []
+        assert summary.active_days == detailed[did].active_days
+        assert summary.on_track == detailed[did].on_track
+
+
 def test_get_daily_engagement_breakdown(tmp_path: Path) -> None:
     engine = _make_engine()
     did = "did:detail"
@@ -212,3 +274,137 @@ def test_get_daily_engagement_breakdown(tmp_path: Path) -> None:
     assert day1.retrievals == 2
     assert day1.engagements == 3
     assert day1.engagement_breakdown.get("repost") == 3
+
+
+def test_get_daily_engagement_breakdown_bulk_includes_idle_participants() -> None:
+    engine = _make_engine()
+    _insert_activity(engine, did="did:busy", day_offset=1, retrievals=1, engagements=3)
+
+    settings = Settings().with_overrides(
+        tz="UTC",
+        window_days=2,
+        required_active_days=1,
+        cutoff_hour_local=0,
+    )
+    breakdowns = get_daily_engagement_breakdown_bulk(
+        engine,
+        ["did:idle", "did:busy"],
+        settings,
+        now=datetime(2025, 1, 2, 18, tzinfo=timezone.utc),
+    )
+
+    assert list(breakdowns) == ["did:idle", "did:busy"]
+    assert [snap.retrievals for snap in breakdowns["did:idle"]] == [0, 0]
+    assert [snap.engagements for snap in breakdowns["did:busy"]] == [0, 3]
+
+
+def test_get_daily_engagement_breakdown_splits_fractional_offset_hours() -> None:
+    # Asia/Kolkata is UTC+05:30, so a 04:00 cut-off falls at 22:30 UTC and the
+    # counts must not be bucketed by whole UTC hours.
+    engine = _make_engine()
+    did = "did:kolkata"
+    with engine.begin() as conn:
+        for ts in ("2025-01-01T22:10:00+00:00", "2025-01-01T22:40:00+00:00"):
+            conn.execute(
+                text(
+                    "INSERT INTO feed_requests (requester_did, timestamp) VALUES (:did, :ts)"
+                ),
+                {"did": did, "ts": ts},
+            )
+
+    settings = Settings().with_overrides(tz="Asia/Kolkata", cutoff_hour_local=4)
+    snapshots = get_daily_engagement_breakdown(
+        engine,
+        did,
+        settings,
+        start_day=datetime(2025, 1, 1).date(),
+        end_day=datetime(2025, 1, 2).date(),
+    )
+
+    assert [snap.retrievals for snap in snapshots] == [1, 1]
+
+
+def test_get_daily_engagement_breakdown_window_starts_at_local_cutoff() -> None:
+    # 04:10 Amsterdam time (UTC+1 in winter) is just after the 04:00 cut-off
+    # and belongs to the first day of the window.
+    engine = _make_engine()
+    did = "did:amsterdam"
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO feed_requests (requester_did, timestamp) VALUES (:did, :ts)"
+            ),
+            {"did": did, "ts": "2025-01-01T03:10:00+00:00"},
+        )
+
+    settings = Settings().with_overrides(tz="Europe/Amsterdam", cutoff_hour_local=4)
+    first_day = datetime(2025, 1, 1).date()
+    snapshots = get_daily_engagement_breakdown(
+        engine, did, settings, start_day=first_day, end_day=first_day
+    )
+
+    assert [snap.retrievals for snap in snapshots] == [1]
+
+
+def test_get_daily_engagement_breakdown_bounds_match_naive_timestamps() -> None:
+    # Rows stored without an offset sit exactly on the study-day boundaries:
+    # the first belongs to the window, the second to the day after it.
+    engine = _make_engine()
+    did = "did:naive"
+    with engine.begin() as conn:
+        for ts in ("2025-01-01T00:00:00", "2025-01-03T00:00:00"):
+            conn.execute(
+                text(
+                    "INSERT INTO feed_requests (requester_did, timestamp) VALUES (:did, :ts)"
+                ),
+                {"did": did, "ts": ts},
+            )
+
+    settings = Settings().with_overrides(tz="UTC", cutoff_hour_local=0)
+    snapshots = get_daily_engagement_breakdown(
+        engine,
+        did,
+        settings,
+        start_day=datetime(2025, 1, 1).date(),
+        end_day=datetime(2025, 1, 2).date(),
+    )
+
+    assert [snap.retrievals for snap in snapshots] == [1, 0]
+
+
+def test_get_daily_engagement_breakdown_converts_offset_timestamps() -> None:
+    # 03:30Z falls before the 04:00 cut-off and 04:30Z after it, even though
+    # both rows read 2025-01-02 in their own +02:00 offset.
+    engine = _make_engine()
+    did = "did:offset"
+    with engine.begin() as conn:
+        for ts in ("2025-01-02T05:30:00+02:00", "2025-01-02T06:30:00+02:00"):
+            conn.execute(
+                text(
+                    "INSERT INTO feed_requests (requester_did, timestamp) VALUES (:did, :ts)"
+                ),
+                {"did": did, "ts": ts},
+            )
+
+    settings = Settings().with_overrides(tz="UTC", cutoff_hour_local=4)
+    snapshots = get_daily_engagement_breakdown(
+        engine,
+        did,
+        settings,
+        start_day=datetime(2025, 1, 1).date(),
+        end_day=datetime(2025, 1, 2).date(),
+    )
+
+    assert [snap.retrievals for snap in snapshots] == [1, 1]
+
+
+def test_participants_with_activity_limits_to_requested_dids() -> None:
+    engine = _make_engine()
+    _insert_activity(engine, did="did:feed", day_offset=0, retrievals=1, engagements=0)
+    _insert_activity(engine, did="did:engaged", day_offset=0, retrievals=0, engagements=2)
+    _insert_activity(engine, did="did:other", day_offset=0, retrievals=1, engagements=1)
+
+    requested = ["did:feed", "did:engaged", "did:silent"]
+    requested += [f"did:bulk:{index}" for index in range(600)]
+
+    assert participants_with_activity(engine, requested) == {"did:feed", "did:engaged"}
@@ -0,0 +1,97 @@
+from pathlib import Path
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app import config  # noqa: E402
+
+
+def test_parse_yaml_keeps_scalar_types(tmp_path):
+    path = tmp_path / "user_config.yml"
+    path.write_text(
+        "requirements:\n"
+        "  defaults:\n"
+        "    min_retrievals: 1\n"
+        '    day_cut_off: "05:00"\n'
+        "mailer:\n"
+        "  dry_run: false\n"
+        "qualtrics:\n"
+        "  survey_ids: [SV_1, SV_2]\n"
+    )
+
+    parsed = config._parse_yaml(path)
+    assert parsed["requirements"]["defaults"] == {
+        "min_retrievals": 1,
+        "day_cut_off": "05:00",
+    }
+    assert parsed["mailer"]["dry_run"] is False
+    assert parsed["qualtrics"]["survey_ids"] == ["SV_1", "SV_2"]
+
+    path.write_text("")
+    assert config._parse_yaml(path) == {}
+
+
+def test_settings_defaults_resolve_per_instance(monkeypatch):
+    monkeypatch.setenv("SMTP_PASSWORD", "first")
+    first = config.Settings()
+    monkeypatch.setenv("SMTP_PASSWORD", "second")
+    assert config.Settings().smtp_password == "second"
+    assert first.smtp_password == "first"
+    assert first.with_overrides(smtp_port=2525).smtp_password == "first"
+
+
+def test_flatten_keeps_sections_and_leaves():
+    tree = {"mailer": {"port": 587, "tls": {"enabled": True}}, "tz": "UTC"}
+    flat = config._flatten(tree)
+    assert flat["mailer.port"] == 587
+    assert flat["mailer.tls.enabled"] is True
+    assert flat["mailer.tls"] == {"enabled": True}
+    assert flat["tz"] == "UTC"
+    assert "mailer.host" not in flat
+
+
+def test_resolved_paths_follow_the_working_directory(tmp_path, monkeypatch):
+    first = tmp_path / "first"
+    second = tmp_path / "second"
+    first.mkdir()
+    second.mkdir()
+
+    monkeypatch.chdir(first)
+    assert config._resolved(Path("outbox")) == first.resolve() / "outbox"
+    monkeypatch.chdir(second)
+    assert config._resolved(Path("outbox")) == second.resolve() / "outbox"
+
+
+def test_merge_config_overlays_nested_sections_in_place():
+    base = {"mailer": {"host": "smtp.example.com", "port": 587}, "tz": "UTC"}
+    section = base["mailer"]
+    merged = config._merge_config(base, {"mailer": {"port": 2525}})
+    assert merged is base
+    assert merged["mailer"] is section
+    assert merged["mailer"] == {"host": "smtp.example.com", "port": 2525}
+    assert merged["tz"] == "UTC"
+
+
+def test_config_is_read_only_view():
+    assert config.CONFIG["general"]["tz"] == config._config_get("general.tz")
+    with pytest.raises(TypeError):
+        config.CONFIG["general"] = {}
+
+
+def test_settings_to_dict_hides_secrets(monkeypatch):
+    monkeypatch.setenv("SMTP_PASSWORD", "smtp-secret")
+    monkeypatch.setenv("IMAP_PASSWORD", "imap-secret")
+    monkeypatch.setenv("QUALTRICS_API_TOKEN", "token")
+    settings = config.Settings()
+    data = settings.to_dict()
+
+    assert "smtp_password" not in data
+    assert "imap_password" not in data
+    assert data["qualtrics_api_token"] is True
+    assert data["mail_db_path"] == str(settings.mail_db_path)
+    assert data["requirements"] == settings.requirements
+    assert data["requirements"] is not settings.requirements
@@ -0,0 +1,46 @@
+from pathlib import Path
+import sqlite3
+import sys
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.db import get_engine  # noqa: E402
+
+
+def test_get_engine_read_only_rejects_writes(tmp_path) -> None:
+    db_path = tmp_path / "compliance db#1.sqlite"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE feed_requests (requester_did TEXT)")
+    conn.execute("INSERT INTO feed_requests VALUES ('did:feed')")
+    conn.commit()
+    conn.close()
+
+    engine = get_engine(db_path, read_only=True)
+    assert get_engine(db_path, read_only=True) is engine
+    with engine.connect() as conn:
+        dids = conn.execute(text("SELECT requester_did FROM feed_requests")).scalars()
+        assert list(dids) == ["did:feed"]
+        assert conn.exec_driver_sql("PRAGMA temp_store").scalar() == 2
+        assert conn.exec_driver_sql("PRAGMA cache_size").scalar() == -65536
+        with pytest.raises(OperationalError, match="readonly"):
+            conn.execute(text("INSERT INTO feed_requests VALUES ('did:new')"))
+    engine.dispose()
+
+
+def test_get_engine_shares_engine_across_path_spellings(tmp_path, monkeypatch) -> None:
+    db_path = tmp_path / "compliance.sqlite"
+    sqlite3.connect(db_path).close()
+    link = tmp_path / "link.sqlite"
+    link.symlink_to(db_path)
+    monkeypatch.chdir(tmp_path)
+
+    engine = get_engine(db_path, read_only=True)
+    assert get_engine(Path("compliance.sqlite"), read_only=True) is engine
+    assert get_engine(link, read_only=True) is engine
+    assert get_engine(db_path) is not engine
@@ -41,3 +41,15 @@ def test_render_daily_progress_non_compliant_template(tmp_path, monkeypatch):
     email = render_daily_progress(summary, participant, subject="Test Subject")
     assert "Action Needed" in email.text_body
     assert "We did not detect any feed retrievals" in email.text_body
+
+
+def test_render_daily_progress_reuses_compiled_templates():
+    from app import email_renderer
+
+    participant = Participant(user_did="did:example:123", email="user@example.com")
+    summary = _build_summary(retrievals=2, engagements=4, active=True)
+    render_daily_progress(summary, participant, subject="First")
+    misses = email_renderer._templates.cache_info().misses
+    email = render_daily_progress(summary, participant, subject="Second")
+    assert email_renderer._templates.cache_info().misses == misses
+    assert email.subject == "Second"
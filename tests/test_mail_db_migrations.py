@@ -2,9 +2,13 @@
 
 from __future__ import annotations
 
+from pathlib import Path
+
 from sqlalchemy import create_engine, inspect, text
 
 from app.mail_db import SCHEMA_VERSION, apply_migrations
+from app.mail_db import migrations
+from app.mail_db.migrations import get_mail_db_engine
 
 
 def test_apply_migrations_creates_schema(tmp_path) -> None:
@@ -52,3 +56,68 @@ def test_apply_migrations_is_idempotent(tmp_path) -> None:
     apply_migrations(db_path)
     second_run = apply_migrations(db_path)
     assert second_run == SCHEMA_VERSION
+
+
+def test_mail_db_engine_tunes_connections(tmp_path) -> None:
+    db_path = tmp_path / "mail.sqlite"
+    apply_migrations(db_path)
+
+    with get_mail_db_engine(db_path).connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+        assert conn.exec_driver_sql("PRAGMA temp_store").scalar() == 2
+        assert conn.exec_driver_sql("PRAGMA cache_size").scalar() == -65536
+
+
+def test_mail_db_engine_is_shared_across_path_spellings(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+
+    engine = get_mail_db_engine(tmp_path / "data" / "mail.sqlite")
+    assert get_mail_db_engine(Path("data/../data/mail.sqlite")) is engine
+
+
+def test_ensure_migrated_runs_once_per_file(tmp_path, monkeypatch) -> None:
+    db_path = tmp_path / "mail.sqlite"
+    calls = []
+    real_apply = migrations.apply_migrations
+
+    def counting_apply(path):
+        calls.append(path)
+        return real_apply(path)
+
+    monkeypatch.setattr(migrations, "apply_migrations", counting_apply)
+
+    migrations.ensure_migrated(db_path)
+    migrations.ensure_migrated(tmp_path / "." / "mail.sqlite")
+    assert len(calls) == 1
+    assert db_path.exists()
+
+
+def test_email_lookups_use_lowercase_index(tmp_path) -> None:
+    db_path = tmp_path / "mail.sqlite"
+    apply_migrations(db_path)
+
+    with get_mail_db_engine(db_path).connect() as conn:
+        plan = conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT participant_id FROM participants "
+            "WHERE lower(participants.email) IN ('a@example.com', 'b@example.com')"
+        ).fetchall()
+    assert any("idx_participants_email_lower" in row[-1] for row in plan)
+
+
+def test_latest_attempt_lookup_uses_index_without_sort(tmp_path) -> None:
+    db_path = tmp_path / "mail.sqlite"
+    apply_migrations(db_path)
+
+    with get_mail_db_engine(db_path).connect() as conn:
+        plan = [
+            row[-1]
+            for row in conn.exec_driver_sql(
+                "EXPLAIN QUERY PLAN SELECT attempt_id FROM send_attempts "
+                "WHERE participant_id = 1 "
+                "ORDER BY created_at DESC, attempt_id DESC LIMIT 1"
+            )
+        ]
+    assert any("idx_send_attempts_participant_created" in step for step in plan)
+    assert not any("TEMP B-TREE" in step for step in plan)
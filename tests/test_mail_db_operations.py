@@ -4,10 +4,11 @@ from pathlib import Path
 from typing import Optional
 
 import pytest
-from sqlalchemy import select, update
+from sqlalchemy import func, select, update
 
 from app.mail_db.migrations import apply_migrations
 from app.mail_db.operations import (
+    ComplianceMonitoringRow,
     InvalidStatusError,
     ParticipantNotFoundError,
     RosterUpsertResult,
@@ -18,10 +19,18 @@ from app.mail_db.operations import (
     seed_survey_completion,
     upsert_compliance_monitoring_rows,
     fetch_recent_send_attempts,
+    find_participant_ids,
+    find_participants_by_emails,
     get_mail_db_engine,
+    iter_recent_send_attempts,
+    list_participant_dids,
     list_participants,
     mark_send_attempt_bounced,
+    mark_send_attempts_bounced,
+    participant_exists,
     record_send_attempt,
+    record_send_attempt_by_id,
+    record_send_attempts_bulk,
     set_participant_status,
     update_send_attempt,
     upsert_participants,
@@ -231,6 +240,166 @@ def test_upsert_participants_preserves_existing_status(tmp_path) -> None:
     assert single["study_type"] == ""
 
 
+def test_upsert_participants_streams_batches(tmp_path) -> None:
+    db_path = tmp_path / "mail.sqlite"
+    apply_migrations(db_path)
+    _seed_participant(db_path)
+
+    def records():
+        yield {"did": "did:example:123", "email": "moved@example.com"}
+        for index in range(1200):
+            yield {"did": f"did:bulk:{index}", "email": f"bulk{index}@example.com"}
+        # Repeats within and across batches update rather than re-insert.
+        yield {"did": "did:bulk:1199", "email": "bulk1199@example.com", "type": "admin"}
+        yield {"did": "did:bulk:0", "email": "first@example.com"}
+
+    summary = upsert_participants(db_path, records())
+
+    assert summary.inserted == 1200
+    assert summary.updated == 2
+    assert summary.total == 1201
+
+    roster_by_did = {row["did"]: row for row in list_participants(db_path)}
+    assert roster_by_did["did:example:123"]["email"] == "moved@example.com"
+    assert roster_by_did["did:bulk:1199"]["type"] == "admin"
+    assert roster_by_did["did:bulk:0"]["email"] == "first@example.com"
+
+
+def test_upsert_participants_batches_updates(tmp_path) -> None:
+    db_path = tmp_path / "mail.sqlite"
+    apply_migrations(db_path)
+    upsert_participants(
+        db_path,
+        [
+            {"did": "did:a", "email": "a@example.com", "language": "en"},
+            {"did": "did:b", "email": "b@example.com", "language": "en"},
+            {"did": "did:c", "email": "c@example.com", "language": "en"},
+        ],
+    )
+
+    summary = upsert_participants(
+        db_path,
+        [
+            {"did": "did:a", "email": "a2@example.com"},
+            {"did": "did:b", "email": "b@example.com", "language": "nl"},
+            {"did": "did:c", "email": "c@example.com"},
+            # A repeated DID keeps the earlier change and adds its own.
+            {"did": "did:a", "email": "a2@example.com", "type": "admin"},
+        ],
+    )
+
+    assert summary.inserted == 0
+    assert summary.updated == 2
+    roster_by_did = {row["did"]: row for row in list_participants(db_path)}
+    assert roster_by_did["did:a"]["email"] == "a2@example.com"
+    assert roster_by_did["did:a"]["type"] == "admin"
+    assert roster_by_did["did:b"]["language"] == "nl"
+    assert roster_by_did["did:c"]["email"] == "c@example.com"
+
+
+def test_upsert_participants_without_email_only_updates(tmp_path) -> None:
+    db_path = tmp_path / "mail.sqlite"
+    apply_migrations(db_path)
+    _seed_participant(db_path)
+
+    summary = upsert_participants(
+        db_path,
+        [
+            {"did": "did:example:123", "email": "", "language": "nl"},
+            {"did": "did:missing", "email": ""},
+        ],
+    )
+
+    assert summary.inserted == 0
+    assert summary.updated == 1
+    assert summary.total == 1
+    (single,) = list_participants(db_path)
+    assert single["language"] == "nl"
+    assert single["email"] != ""
+
+
+def test_upsert_participants_without_email_stores_datetimes_like_inserts(
+    tmp_path,
+) -> None:
+    db_path = tmp_path / "mail.sqlite"
+    apply_migrations(db_path)
+    upsert_participants(
+        db_path,
+        [
+            {
+                "did": "did:inserted",
+                "email": "a@example.com",
+                "survey_completed_at": "2025-01-02T03:04:05Z",
+            },
+            {"did": "did:updated", "email": "b@example.com"},
+        ],
+    )
+    upsert_participants(
+        db_path,
+        [
+            {
+                "did": "did:updated",
+                "email": "",
+                "survey_completed_at": "2025-01-01T10:00:00Z",
+            }
+        ],
+    )
+
+    engine = get_mail_db_engine(db_path)
+    with engine.connect() as conn:
+        stored = dict(
+            conn.exec_driver_sql(
+                "SELECT user_did, survey_completed_at FROM participants"
+            ).all()
+        )
+    assert stored == {
+        "did:inserted": "2025-01-02 03:04:05.000000",
+        "did:updated": "2025-01-01 10:00:00.000000",
+    }
+
+
+def test_list_participants_orders_by_email_then_did(tmp_path) -> None:
+    db_path = tmp_path / "mail.sqlite"
+    apply_migrations(db_path)
+    upsert_participants(
+        db_path,
+        [
+            {"did": "did:c", "email": "b@example.com"},
+            {"did": "did:b", "email": "a@example.com"},
+            {"did": "did:a", "email": "b@example.com"},
+        ],
+    )
+
+    roster = list_participants(db_path)
+
+    assert [(row["email"], row["did"]) for row in roster] == [
+        ("a@example.com", "did:b"),
+        ("b@example.com", "did:a"),
+        ("b@example.com", "did:c"),
+    ]
+
+
+def test_participant_exists(tmp_path) -> None:
+    db_path = tmp_path / "mail.sqlite"
+    apply_migrations(db_path)
+    _seed_participant(db_path)
+
+    assert participant_exists(db_path, "did:example:123")
+    assert participant_exists(db_path, " did:example:123 ")
+    assert not participant_exists(db_path, "did:example:missing")
+
+
+def test_list_participant_dids(tmp_path) -> None:
+    db_path = tmp_path / "mail.sqlite"
+    apply_migrations(db_path)
+    assert list_participant_dids(db_path) == []
+
+    _seed_participant(db_path)
+    upsert_participants(db_path, [{"did": "did:example:000", "email": "a@example.com"}])
+
+    assert list_participant_dids(db_path) == ["did:example:000", "did:example:123"]
+
+
 def test_export_participants_to_csv_appends_new_rows(tmp_path) -> None:
     db_path = tmp_path / "mail.sqlite"
     apply_migrations(db_path)
@@ -288,6 +457,31 @@ def test_export_participants_to_csv_appends_new_rows(tmp_path) -> None:
     assert len(rows_again) == 2
 
 
+def test_export_participants_to_csv_keeps_existing_column_order(tmp_path) -> None:
+    db_path = tmp_path / "mail.sqlite"
+    apply_migrations(db_path)
+    upsert_participants(
+        db_path, [{"did": "did:alpha", "email": "alpha@example.com", "language": "nl"}]
+    )
+
+    csv_path = tmp_path / "participants.csv"
+    csv_path.write_text("did,notes,email\n", encoding="utf-8")
+
+    export_participants_to_csv(db_path, csv_path)
+
+    with csv_path.open(encoding="utf-8", newline="") as handle:
+        reader = csv.reader(handle)
+        header = next(reader)
+        (row,) = list(reader)
+
+    assert header[:3] == ["did", "notes", "email"]
+    record = dict(zip(header, row))
+    assert record["did"] == "did:alpha"
+    assert record["notes"] == ""
+    assert record["email"] == "alpha@example.com"
+    assert record["audit_timestamp"].strip()
+
+
 def test_seed_survey_completion_updates_selected_types(tmp_path) -> None:
     db_path = tmp_path / "mail.sqlite"
     apply_migrations(db_path)
@@ -433,6 +627,106 @@ def test_upsert_compliance_monitoring_rows(tmp_path) -> None:
     assert refreshed["engagement_breakdown"] == '{"like": 3, "reply": 1}'
 
 
+def test_upsert_compliance_monitoring_rows_accepts_row_objects(tmp_path) -> None:
+    db_path = tmp_path / "mail.sqlite"
+    start = datetime(2025, 1, 1).date()
+    computed_at = datetime(2025, 10, 3, tzinfo=timezone.utc)
+    rows = (
+        ComplianceMonitoringRow(
+            snapshot_date=start + timedelta(days=index % 30),
+            user_did=f"did:{index // 30}",
+            study_label="pilot",
+            retrievals=1,
+            engagements=index,
+            engagement_breakdown={"like": index},
+            active_day=1,
+            cumulative_active=index % 30 + 1,
+            cumulative_skip=0,
+            computed_at=computed_at,
+        )
+        for index in range(1200)
+    )
+
+    assert upsert_compliance_monitoring_rows(db_path, rows) == 1200
+    assert upsert_compliance_monitoring_rows(db_path, []) == 0
+
+    engine = get_mail_db_engine(db_path)
+    with engine.connect() as conn:
+        count = conn.execute(
+            select(func.count()).select_from(compliance_monitoring)
+        ).scalar_one()
+        last = conn.execute(
+            select(compliance_monitoring.c.engagement_breakdown).where(
+                compliance_monitoring.c.user_did == "did:39",
+                compliance_monitoring.c.snapshot_date == start + timedelta(days=29),
+            )
+        ).scalar_one()
+    assert count == 1200
+    assert last == '{"like": 1199}'
+
+
+def test_record_send_attempt_by_resolved_id(tmp_path) -> None:
+    db_path = tmp_path / "mail.sqlite"
+    apply_migrations(db_path)
+    _seed_participant(db_path)
+
+    ids = find_participant_ids(db_path, ["did:example:123", "did:missing", ""])
+    assert list(ids) == ["did:example:123"]
+
+    record = record_send_attempt_by_id(
+        db_path,
+        participant_id=ids["did:example:123"],
+        message_type="daily_update",
+        mode="live",
+        status="queued",
+    )
+
+    assert record.participant_id == ids["did:example:123"]
+    (attempt,) = fetch_recent_send_attempts(db_path)
+    assert attempt["attempt_id"] == record.attempt_id
+    assert attempt["user_did"] == "did:example:123"
+
+
+def test_record_send_attempts_bulk(tmp_path) -> None:
+    db_path = tmp_path / "mail.sqlite"
+    apply_migrations(db_path)
+    upsert_participants(
+        db_path,
+        [
+            {"did": "did:a", "email": "a@example.com"},
+            {"did": "did:b", "email": "b@example.com"},
+        ],
+    )
+    ids = find_participant_ids(db_path, ["did:a", "did:b"])
+
+    records = record_send_attempts_bulk(
+        db_path,
+        [
+            {
+                "user_did": did,
+                "message_type": "daily_update",
+                "mode": "live",
+                "status": "queued",
+                "template_version": "daily_progress_v1",
+            }
+            for did in ("did:b", "did:missing", "did:a", "did:b")
+        ],
+    )
+
+    assert [record.participant_id for record in records] == [
+        ids["did:b"],
+        ids["did:a"],
+        ids["did:b"],
+    ]
+    assert len({record.attempt_id for record in records}) == 3
+    attempts = {row["attempt_id"]: row for row in fetch_recent_send_attempts(db_path)}
+    for record in records:
+        attempt = attempts[record.attempt_id]
+        assert ids[attempt["user_did"]] == record.participant_id
+        assert attempt["template_version"] == "daily_progress_v1"
+    assert record_send_attempts_bulk(db_path, []) == []
+
+
 def test_record_and_update_send_attempt(tmp_path) -> None:
     db_path = tmp_path / "mail.sqlite"
     apply_migrations(db_path)
@@ -517,6 +811,38 @@ def test_fetch_recent_send_attempts(tmp_path) -> None:
     assert attempts[1]["template_version"] == "v1"
 
 
+def test_iter_recent_send_attempts_streams_past_one_batch(tmp_path) -> None:
+    db_path = tmp_path / "mail.sqlite"
+    apply_migrations(db_path)
+    _seed_participant(db_path)
+
+    engine = get_mail_db_engine(db_path)
+    base = datetime(2025, 10, 20, 10, 0, 0)
+    with engine.begin() as conn:
+        participant_id = conn.execute(select(participants.c.participant_id)).scalar()
+        conn.execute(
+            send_attempts.insert(),
+            [
+                {
+                    "participant_id": participant_id,
+                    "message_type": "daily_update",
+                    "mode": "dry-run",
+                    "status": "queued",
+                    "template_version": f"v{idx}",
+                    "created_at": base + timedelta(minutes=idx),
+                }
+                for idx in range(600)
+            ],
+        )
+
+    attempts = iter_recent_send_attempts(db_path, limit=550)
+    first = next(attempts)
+    assert first["template_version"] == "v599"
+    rest = list(attempts)
+    assert len(rest) == 549
+    assert rest[-1]["template_version"] == "v50"
+
+
 def test_mark_send_attempt_bounced_updates_status_and_participant(tmp_path) -> None:
     db_path = tmp_path / "mail.sqlite"
     apply_migrations(db_path)
@@ -561,3 +887,60 @@ def test_mark_send_attempt_bounced_updates_status_and_participant(tmp_path) -> N
             )
         ).all()
         assert ("inactive", "550 mailbox unavailable") in history
+
+
+def test_mark_send_attempts_bounced_updates_batch(tmp_path) -> None:
+    db_path = tmp_path / "mail.db"
+    apply_migrations(db_path)
+    _seed_participant(db_path, email="User@Example.com")
+
+    first = record_send_attempt(
+        db_path,
+        user_did="did:example:123",
+        message_type="daily_update",
+        mode="live",
+        status="sent",
+    )
+    latest = record_send_attempt(
+        db_path,
+        user_did="did:example:123",
+        message_type="daily_update",
+        mode="live",
+        status="sent",
+    )
+
+    matches = find_participants_by_emails(
+        db_path, ["user@example.com", "missing@example.com"]
+    )
+    assert list(matches) == ["user@example.com"]
+    assert matches["user@example.com"][1] == "did:example:123"
+
+    updated = mark_send_attempts_bounced(
+        db_path,
+        [("did:example:123", " 550 mailbox unavailable "), ("did:example:404", None)],
+        changed_by=" bounce-bot ",
+    )
+    assert updated == ["did:example:123"]
+
+    engine = get_mail_db_engine(db_path)
+    with engine.connect() as conn:
+        statuses = dict(
+            conn.execute(
+                select(send_attempts.c.attempt_id, send_attempts.c.status)
+            ).all()
+        )
+        assert statuses == {first.attempt_id: "sent", latest.attempt_id: "failed"}
+
+        participant_row = conn.execute(
+            select(participants.c.status).where(
+                participants.c.user_did == "did:example:123"
+            )
+        ).one()
+        assert participant_row.status == "inactive"
+        history = conn.execute(
+            select(
+                participant_status_history.c.reason,
+                participant_status_history.c.changed_by,
+            )
+        ).one()
+        assert history == ("550 mailbox unavailable", "bounce-bot")
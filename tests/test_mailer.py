@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import json
 
@@ -75,3 +76,103 @@ def test_mail_sender_records_send_attempt(tmp_path: Path) -> None:
     assert record["status"] == "dry-run"
     assert record["dry_run"] is True
     assert record["user_did"] == "did:example:mailer"
+
+
+class _FakeSMTP:
+    instances: list["_FakeSMTP"] = []
+
+    def __init__(self, host: str, port: int) -> None:
+        self.sent: list[str] = []
+        self.closed = False
+        _FakeSMTP.instances.append(self)
+
+    def __enter__(self) -> "_FakeSMTP":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.quit()
+
+    def ehlo(self) -> None:
+        pass
+
+    def starttls(self) -> None:
+        pass
+
+    def send_message(self, message) -> dict:
+        self.sent.append(message["To"])
+        return {}
+
+    def quit(self) -> None:
+        self.closed = True
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_mail_sender_reuses_connection_in_context(tmp_path: Path, monkeypatch) -> None:
+    mail_db_path = tmp_path / "mail.sqlite"
+    apply_migrations(mail_db_path)
+    settings = _make_settings(tmp_path, mail_db_path).with_overrides(
+        smtp_dry_run=False, smtp_use_ssl=False
+    )
+    _FakeSMTP.instances = []
+    monkeypatch.setattr("app.mailer.smtplib.SMTP", _FakeSMTP)
+
+    rendered = RenderedEmail(subject="Test", text_body="Hello")
+    with MailSender(settings) as sender:
+        for index in range(3):
+            sender.send(rendered, f"user{index}@example.com", user_did=f"did:{index}")
+
+    assert len(_FakeSMTP.instances) == 1
+    connection = _FakeSMTP.instances[0]
+    assert connection.sent == [f"user{index}@example.com" for index in range(3)]
+    assert connection.closed is True
+
+    MailSender(settings).send(rendered, "solo@example.com", user_did="did:solo")
+    assert len(_FakeSMTP.instances) == 2
+
+
+def test_mail_sender_opens_one_session_per_thread(tmp_path: Path, monkeypatch) -> None:
+    mail_db_path = tmp_path / "mail.sqlite"
+    apply_migrations(mail_db_path)
+    settings = _make_settings(tmp_path, mail_db_path).with_overrides(
+        smtp_dry_run=False, smtp_use_ssl=False
+    )
+    _FakeSMTP.instances = []
+    monkeypatch.setattr("app.mailer.smtplib.SMTP", _FakeSMTP)
+
+    rendered = RenderedEmail(subject="Test", text_body="Hello")
+    recipients = [f"user{index}@example.com" for index in range(8)]
+    with MailSender(settings) as sender, ThreadPoolExecutor(max_workers=2) as pool:
+        list(
+            pool.map(
+                lambda email: sender.send(rendered, email, user_did=email), recipients
+            )
+        )
+
+    assert 1 <= len(_FakeSMTP.instances) <= 2
+    assert all(connection.closed for connection in _FakeSMTP.instances)
+    delivered = [email for conn in _FakeSMTP.instances for email in conn.sent]
+    assert sorted(delivered) == sorted(recipients)
+    lines = Path(settings.send_log_path).read_text(encoding="utf-8").splitlines()
+    assert len(lines) == len(recipients)
+
+
+def test_mail_sender_keeps_send_log_open_in_context(tmp_path: Path) -> None:
+    mail_db_path = tmp_path / "mail.sqlite"
+    apply_migrations(mail_db_path)
+    settings = _make_settings(tmp_path, mail_db_path)
+    log_path = Path(settings.send_log_path)
+
+    rendered = RenderedEmail(subject="Test", text_body="Hello")
+    with MailSender(settings) as sender:
+        sender.send(rendered, "first@example.com", user_did="did:first")
+        handle = sender._log_handle
+        assert handle is not None
+        sender.send(rendered, "second@example.com", user_did="did:second")
+        assert sender._log_handle is handle
+        assert len(log_path.read_text(encoding="utf-8").splitlines()) == 2
+
+    assert handle.closed
+    MailSender(settings).send(rendered, "solo@example.com", user_did="did:solo")
+    assert len(log_path.read_text(encoding="utf-8").splitlines()) == 3
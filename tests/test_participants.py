@@ -4,7 +4,7 @@ from pathlib import Path
 from app.mail_db.migrations import apply_migrations
 from app.mail_db.operations import get_mail_db_engine
 from app.mail_db.schema import participants as participants_table
-from app.participants import load_participants
+from app.participants import load_active_participants, load_participants
 
 
 def test_participants_csv_integrity() -> None:
@@ -84,3 +84,25 @@ def test_load_participants_prefers_mail_db(tmp_path: Path) -> None:
     assert participant.feed_url == "https://feeds.example.com/db"
     assert participant.prolific_id is None
     assert participant.study_type is None
+
+
+def test_load_active_participants_skips_inactive(tmp_path: Path) -> None:
+    db_path = tmp_path / "mail.sqlite"
+    apply_migrations(db_path)
+    engine = get_mail_db_engine(db_path)
+    with engine.begin() as conn:
+        for index, status in enumerate(["active", "inactive", "active"]):
+            conn.execute(
+                participants_table.insert().values(
+                    user_did=f"did:db:{index}",
+                    email=f"db{index}@example.com",
+                    status=status,
+                    type="pilot",
+                )
+            )
+
+    participants = load_active_participants(
+        tmp_path / "participants.csv", mail_db_path=db_path
+    )
+    assert sorted(p.user_did for p in participants) == ["did:db:0", "did:db:2"]
+    assert all(p.include_in_emails for p in participants)